@@ -1,27 +1,179 @@
+import os
+import time
+import pandas as pd
 import streamlit as st
 from noticias import obter_nome_commodity, buscar_noticias
-from previsao import executar_previsao
+from configuracao import TICKERS_VALIDOS, HORIZONTE_PAINEL
+from metricas import metricas, servir_prometheus, PORTA_METRICAS
+from tarefas import FilaTarefas
+from instantaneos import ler_ticker
 
 st.set_page_config(page_title="Previsão de Commodities", layout="wide")
 
 st.title("📊 Previsão e Notícias de Commodities")
 
-# Dicionário completo de tickers válidos
-TICKERS_VALIDOS = {
-    # Metais
-    "GC=F": "Ouro", "SI=F": "Prata", "PL=F": "Platina", "PA=F": "Paládio", "HG=F": "Cobre",
-    # Energia
-    "CL=F": "Petróleo WTI", "BZ=F": "Petróleo Brent", "NG=F": "Gás Natural",
-    "RB=F": "Gasolina RBOB", "HO=F": "Óleo de Aquecimento",
-    # Grãos e Agricultura
-    "ZC=F": "Milho", "ZS=F": "Soja", "ZW=F": "Trigo", "KE=F": "Trigo Vermelho",
-    "ZM=F": "Farelo de Soja", "ZL=F": "Óleo de Soja", "ZO=F": "Aveia",
-    # Carnes
-    "LE=F": "Gado Vivo", "HE=F": "Carne de Porco", "GF=F": "Gado de Corte",
-    # Soft Commodities
-    "SB=F": "Açúcar", "CC=F": "Cacau", "KC=F": "Café Arábica", "CT=F": "Algodão",
-    "OJ=F": "Suco de Laranja", "LBS=F": "Madeira"
-}
+# Idade máxima (s) dos resultados exibidos antes de agendar uma atualização em segundo plano
+VALIDADE_PREVISAO = int(os.environ.get("COMODOS_VALIDADE_PREVISAO", 60 * 60))
+VALIDADE_NOTICIAS = int(os.environ.get("COMODOS_VALIDADE_NOTICIAS", 5 * 60))
+# Intervalo (s) em que uma coluna com trabalho pendente confere se ele terminou
+INTERVALO_PAINEL = 2
+# Idade máxima (s) de um instantâneo publicado para ser exibido no lugar do cálculo local; 0 desliga
+VALIDADE_INSTANTANEO = int(os.environ.get("COMODOS_VALIDADE_INSTANTANEO", 6 * 60 * 60))
+
+# st.fragment só existe a partir do Streamlit 1.37; antes era experimental_fragment
+fragmento = getattr(st, "fragment", None) or st.experimental_fragment
+
+if PORTA_METRICAS:
+    # Endpoint /metrics para o Prometheus; sobe uma vez por processo, não a cada rerun
+    servir_prometheus()
+
+
+@st.cache_resource
+def obter_filas():
+    """Filas únicas por processo, compartilhadas por todas as sessões e reruns."""
+    return {
+        "previsao": FilaTarefas("previsao", max_workers=int(os.environ.get("COMODOS_TAREFAS_PREVISAO", 2))),
+        "noticias": FilaTarefas("noticias", max_workers=4),
+    }
+
+
+def _prever(ticker):
+    # Importado só aqui: torch e companhia não atrasam a primeira renderização da página
+    from previsao import executar_previsao
+    return executar_previsao(ticker, exibir_log=False, horizonte=HORIZONTE_PAINEL)
+
+
+def _idade(instante):
+    minutos = int((time.time() - instante) // 60)
+    return "agora há pouco" if minutos < 1 else f"há {minutos} min"
+
+
+def _instantaneo(ticker):
+    """Documento do ticker no instantâneo publicado por instantaneos.py, se for recente o bastante."""
+    documento = ler_ticker(ticker)
+    if documento and time.time() - documento["gerado_em"] <= VALIDADE_INSTANTANEO:
+        return documento
+    return None
+
+
+def montar_grafico(previsao):
+    """Tabela por data com o período de teste (real x previsto) e o leque de previsão à frente."""
+    grafico, faixa = previsao["grafico"], previsao["horizonte"]
+    teste = pd.DataFrame({
+        "Real": grafico["real"],
+        "Previsto (teste)": grafico["previsto"],
+    }, index=pd.to_datetime(grafico["datas"]))
+    # As curvas futuras partem do último preço para ficarem ligadas ao histórico
+    futuro = pd.DataFrame({
+        "Previsão": [previsao["preco_atual"], *faixa["previsao"]],
+        "Inferior (5%)": [previsao["preco_atual"], *faixa["inferior"]],
+        "Superior (95%)": [previsao["preco_atual"], *faixa["superior"]],
+    }, index=pd.to_datetime([previsao["data_atual"], *faixa["datas"]]))
+    return teste.join(futuro, how="outer").rename_axis("Data")
+
+
+def exibir_previsao(previsao, nome):
+    faixa = previsao["horizonte"]
+    st.line_chart(montar_grafico(previsao))
+    st.caption(f"Próximos {len(faixa['dias'])} dias úteis com intervalo de 90% (MC dropout)")
+
+    st.markdown(f"""
+        ### 📊 Resultado da Previsão – {nome}
+        - **Preço Atual:** USD {previsao['preco_atual']:.2f}  
+        - **Previsão para Amanhã:** USD {previsao['previsao_amanha']:.2f}  
+        - **RMSE (Raiz Erro Quadrático Médio):** {previsao['rmse']:.4f}  
+        - **Acurácia de Direção:** {previsao['acuracia']:.2%}  
+    """)
+
+
+def exibir_noticias(noticias):
+    if isinstance(noticias, list):
+        for n in noticias:
+            st.markdown(f"- [{n['titulo']}]({n['link']})")
+    else:
+        st.info(noticias.get("mensagem", "Nenhuma notícia encontrada."))
+
+
+def mostrar_previsao(resultado, nome, atualizando):
+    if resultado is None:
+        st.info("⏳ Treinando o modelo e gerando a previsão... os resultados aparecem aqui assim que ficarem prontos.")
+        return
+    if resultado["erro"]:
+        st.error(f"Erro ao gerar previsão: {resultado['erro']}")
+        return
+
+    exibir_previsao(resultado["valor"], nome)
+
+    sufixo = " · atualizando em segundo plano..." if atualizando else ""
+    st.caption(f"Gerada {_idade(resultado['concluido_em'])} em {resultado['segundos']:.1f}s{sufixo}")
+
+
+def mostrar_noticias(resultado):
+    if resultado is None:
+        st.info("⏳ Buscando notícias...")
+        return
+    if resultado["erro"]:
+        st.error(f"Erro ao buscar notícias: {resultado['erro']}")
+        return
+
+    exibir_noticias(resultado["valor"])
+
+
+def _consultar_previsao(ticker):
+    fila = obter_filas()["previsao"]
+    return fila.obter(ticker, _prever, ticker, validade=VALIDADE_PREVISAO), fila.em_andamento(ticker)
+
+
+def _consultar_noticias(ticker, nome):
+    fila = obter_filas()["noticias"]
+    return fila.obter(ticker, buscar_noticias, nome, ticker, validade=VALIDADE_NOTICIAS), fila.em_andamento(ticker)
+
+
+# Os fragmentos com run_every só são desenhados enquanto há trabalho pendente. Ao terminar, um
+# rerun completo os troca pela versão estática, e a sessão para de consultar a fila.
+@fragmento(run_every=INTERVALO_PAINEL)
+def acompanhar_previsao(ticker, nome):
+    resultado, pendente = _consultar_previsao(ticker)
+    if not pendente:
+        st.rerun()
+    mostrar_previsao(resultado, nome, atualizando=True)
+
+
+@fragmento(run_every=INTERVALO_PAINEL)
+def acompanhar_noticias(ticker, nome):
+    resultado, pendente = _consultar_noticias(ticker, nome)
+    if not pendente:
+        st.rerun()
+    mostrar_noticias(resultado)
+
+
+def painel_previsao(ticker, nome):
+    # Instantâneo publicado: leitura de um arquivo, sem treino nem inferência neste processo
+    documento = _instantaneo(ticker)
+    if documento and documento["previsao"]:
+        exibir_previsao(documento["previsao"], nome)
+        st.caption(f"Instantâneo {documento['versao']} gerado {_idade(documento['gerado_em'])}")
+        return
+
+    resultado, pendente = _consultar_previsao(ticker)
+    if pendente:
+        acompanhar_previsao(ticker, nome)
+    else:
+        mostrar_previsao(resultado, nome, atualizando=False)
+
+
+def painel_noticias(ticker, nome):
+    documento = _instantaneo(ticker)
+    if documento and documento["noticias"] is not None:
+        exibir_noticias(documento["noticias"])
+        return
+
+    resultado, pendente = _consultar_noticias(ticker, nome)
+    if pendente:
+        acompanhar_noticias(ticker, nome)
+    else:
+        mostrar_noticias(resultado)
+
 
 commodities = sorted(list(TICKERS_VALIDOS.values()))
 
@@ -41,29 +193,11 @@ if nome_commodity in commodities:
 
         with col1:
             st.subheader(f"🔮 Previsão de Preço - {nome}")
-            try:
-                resultado = executar_previsao(ticker, exibir_log=False)
-
-                st.image(f"{ticker}_predictions.png", use_container_width=True)
-
-                st.markdown(f"""
-                    ### 📊 Resultado da Previsão – {nome}
-                    - **Preço Atual:** USD {resultado['preco_atual']:.2f}  
-                    - **Previsão para Amanhã:** USD {resultado['previsao_amanha']:.2f}  
-                    - **RMSE (Raiz Erro Quadrático Médio):** {resultado['rmse']:.4f}  
-                    - **Acurácia de Direção:** {resultado['acuracia']:.2%}  
-                """)
-            except Exception as e:
-                st.error(f"Erro ao gerar previsão: {e}")
+            painel_previsao(ticker, nome)
 
         with col2:
             st.subheader(f"📰 Notícias Recentes - {nome}")
-            noticias = buscar_noticias(nome, ticker)
-            if isinstance(noticias, list):
-                for n in noticias:
-                    st.markdown(f"- [{n['titulo']}]({n['link']})")
-            else:
-                st.info(noticias.get("mensagem", "Nenhuma notícia encontrada."))
+            painel_noticias(ticker, nome)
 else:
     st.error(f"Valor inválido: '{nome_commodity}'. Por favor, escolha uma das seguintes commodities: {', '.join(commodities)}.")
 
@@ -83,4 +217,16 @@ Esta ferramenta combina:
 - Energia e petróleo
 - Grãos e agrícolas
 - Carnes e soft commodities
-""")
\ No newline at end of file
+""")
+
+if st.sidebar.checkbox("🛠️ Painel de depuração", value=False):
+    st.sidebar.markdown("#### Tempo por etapa (acumulado no processo)")
+    resumo = metricas.resumo()
+    if resumo:
+        st.sidebar.dataframe(pd.DataFrame(resumo), hide_index=True)
+    else:
+        st.sidebar.caption("Nenhuma etapa medida ainda.")
+    contadores = metricas.resumo_contadores()
+    if contadores:
+        st.sidebar.dataframe(pd.DataFrame(contadores), hide_index=True)
+    st.sidebar.download_button("Baixar métricas (Prometheus)", metricas.texto_prometheus(), file_name="comodos.prom")
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from tenacity import retry, stop_after_attempt, wait_random_exponential
+from configuracao import DIRETORIO_CACHE
+from arquivos import nome_arquivo, gravar_atomico, gravar_json
+
+DIRETORIO_PRECOS = os.path.join(DIRETORIO_CACHE, "precos")
+COLUNAS_OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+TICKER_DOLAR = "DX-Y.NYB"
+
+# Intervalo mínimo (em segundos) entre consultas ao yfinance para o mesmo ticker
+INTERVALO_ATUALIZACAO = int(os.environ.get("COMODOS_INTERVALO_PRECOS", 60 * 60))
+
+_travas = {}
+_trava_global = threading.Lock()
+
+
+def _trava(ticker):
+    with _trava_global:
+        return _travas.setdefault(ticker, threading.Lock())
+
+
+def _diretorio(ticker):
+    return os.path.join(DIRETORIO_PRECOS, nome_arquivo(ticker))
+
+
+def _ler(ticker):
+    """Lê o histórico salvo. Cada ticker é um único .npy (data em dias + OHLCV), mapeado em memória."""
+    diretorio = _diretorio(ticker)
+    caminho = os.path.join(diretorio, "historico.npy")
+    if not os.path.exists(caminho):
+        return None, {}
+
+    valores = np.load(caminho, mmap_mode="r")
+    datas = pd.to_datetime(np.asarray(valores[:, 0], dtype=np.int64), unit="D")
+    historico = pd.DataFrame(valores[:, 1:], index=datas, columns=COLUNAS_OHLCV)
+    historico.index.name = "Date"
+
+    meta = {}
+    caminho_meta = os.path.join(diretorio, "meta.json")
+    if os.path.exists(caminho_meta):
+        with open(caminho_meta, encoding="utf-8") as f:
+            meta = json.load(f)
+    return historico, meta
+
+
+def _gravar(ticker, historico, meta):
+    diretorio = _diretorio(ticker)
+    os.makedirs(diretorio, exist_ok=True)
+
+    dias = historico.index.values.astype("datetime64[D]").astype(np.int64)
+    valores = np.column_stack([dias, historico[COLUNAS_OHLCV].to_numpy(dtype=np.float64)])
+
+    def gravar(temporario):
+        with open(temporario, "wb") as f:
+            np.save(f, valores)
+
+    # Troca atômica: leitores com mmap aberto continuam vendo o arquivo antigo
+    gravar_atomico(os.path.join(diretorio, "historico.npy"), gravar)
+    gravar_json(os.path.join(diretorio, "meta.json"), meta)
+
+
+def _normalizar(data, ticker):
+    if data is None or data.empty:
+        return pd.DataFrame(columns=COLUNAS_OHLCV, index=pd.DatetimeIndex([], name="Date"), dtype=np.float64)
+    if isinstance(data.columns, pd.MultiIndex):
+        if ticker in data.columns.get_level_values(0):
+            data = data[ticker]
+        elif ticker in data.columns.get_level_values(1):
+            data = data.xs(ticker, level=1, axis=1)
+        else:
+            return _normalizar(None, ticker)
+    data = data[COLUNAS_OHLCV].dropna(how="all")
+    if data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    data.index = data.index.normalize()
+    return data.astype(np.float64)
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=1, min=4, max=10))
+def _baixar(tickers, inicio, fim):
+    """Versão com tratamento de rate limit. Aceita um ticker ou uma lista (download em lote)."""
+    # yfinance só é carregado quando há download; leituras do cache local não precisam dele
+    import yfinance as yf
+    try:
+        data = yf.download(
+            tickers,
+            start=inicio,
+            end=fim,
+            progress=False,
+            threads=isinstance(tickers, list),
+            group_by="ticker"
+        )
+    except Exception as e:
+        if "Rate limited" in str(e):
+            time.sleep(10)
+        raise
+    # Falhas e rate limit do yfinance costumam voltar como DataFrame vazio, sem exceção
+    if data is None or data.empty:
+        raise ValueError(f"Nenhum dado retornado para {tickers}")
+    return data
+
+
+def _mesclar(antigo, novo):
+    if antigo is None or antigo.empty:
+        return novo.sort_index()
+    combinado = pd.concat([antigo, novo])
+    return combinado[~combinado.index.duplicated(keep="last")].sort_index()
+
+
+def _pendente(historico, meta, start_date):
+    """Retorna (inicio, base) do download necessário, ou None se o cache estiver em dia."""
+    completo = historico is not None and meta.get("inicio", start_date) <= start_date
+    recente = time.time() - meta.get("atualizado_em", 0) < INTERVALO_ATUALIZACAO
+    if completo and recente:
+        return None
+    if completo and not historico.empty:
+        # Rebaixa o último candle salvo, que pode ter sido gravado ainda incompleto
+        return historico.index[-1].strftime("%Y-%m-%d"), historico
+    return start_date, None
+
+
+def _atualizar(ticker, base, meta, novo, start_date):
+    # Download vazio não é gravado nem renova atualizado_em: a próxima consulta tenta de novo
+    if novo.empty:
+        raise ValueError(f"Nenhum dado retornado para {ticker}")
+    historico = _mesclar(base, novo)
+    inicio = meta.get("inicio", start_date) if base is not None else start_date
+    _gravar(ticker, historico, {"inicio": inicio, "atualizado_em": time.time()})
+    return historico
+
+
+def obter_historico(ticker, start_date="2023-01-01"):
+    """Retorna OHLCV diário desde start_date, baixando apenas os candles que faltam no cache."""
+    with _trava(ticker):
+        historico, meta = _ler(ticker)
+        pendente = _pendente(historico, meta, start_date)
+
+        if pendente is not None:
+            inicio, base = pendente
+            fim = datetime.now().date().strftime("%Y-%m-%d")
+            try:
+                novo = _normalizar(_baixar(ticker, inicio, fim), ticker)
+                historico = _atualizar(ticker, base, meta, novo, start_date)
+            except Exception as e:
+                if base is None:
+                    raise
+                print(f"Aviso: Falha ao atualizar {ticker}, usando histórico salvo: {e}")
+
+    return historico[historico.index >= pd.Timestamp(start_date)]
+
+
+def atualizar_historicos(tickers, start_date="2023-01-01"):
+    """Atualiza vários tickers (e o dólar) com uma única chamada ao yfinance."""
+    pendentes = {}
+    for ticker in dict.fromkeys(list(tickers) + [TICKER_DOLAR]):
+        historico, meta = _ler(ticker)
+        pendente = _pendente(historico, meta, start_date)
+        if pendente is not None:
+            pendentes[ticker] = (pendente[0], pendente[1], meta)
+
+    if not pendentes:
+        return []
+
+    inicio = min(p[0] for p in pendentes.values())
+    fim = datetime.now().date().strftime("%Y-%m-%d")
+    data = _baixar(list(pendentes), inicio, fim)
+
+    atualizados = []
+    for ticker, (_, base, meta) in pendentes.items():
+        novo = _normalizar(data, ticker)
+        if novo.empty:
+            print(f"Aviso: Nenhum dado retornado para {ticker}")
+            continue
+        with _trava(ticker):
+            _atualizar(ticker, base, meta, novo, start_date)
+        atualizados.append(ticker)
+    return atualizados
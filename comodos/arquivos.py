@@ -0,0 +1,42 @@
+import os
+import json
+import threading
+
+
+def nome_arquivo(ticker):
+    """Ticker como nome de arquivo/pasta: tudo que não é letra ou dígito vira "_" (ex.: KC=F -> KC_F)."""
+    return "".join(c if c.isalnum() else "_" for c in ticker)
+
+
+def gravar_atomico(caminho, gravar, sufixo=""):
+    """Chama gravar(temporario) e troca o arquivo de uma vez: leitores nunca veem um arquivo pela metade.
+
+    O temporário é único por processo e thread; sufixo preserva extensões exigidas por quem grava
+    (np.savez acrescenta ".npz" a nomes sem ela).
+    """
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp{sufixo}"
+    try:
+        gravar(temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+
+def gravar_json(caminho, dados, **opcoes):
+    """gravar_atomico de um documento JSON em UTF-8; opcoes vão para json.dump."""
+    def gravar(temporario):
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(dados, f, **opcoes)
+    gravar_atomico(caminho, gravar)
+
+
+def gravar_texto(caminho, texto):
+    """gravar_atomico de um arquivo de texto em UTF-8."""
+    def gravar(temporario):
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(texto)
+    gravar_atomico(caminho, gravar)
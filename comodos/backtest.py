@@ -0,0 +1,256 @@
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import torch
+from configuracao import TICKERS_VALIDOS
+from armazenamento import obter_historico, COLUNAS_OHLCV, TICKER_DOLAR
+from indicadores import calcular_indicadores
+from janelas import criar_janelas, para_tensor
+from normalizacao import MinMaxScaler
+from lote import inicializar_processo
+from registro_modelos import familia_modelo, chave_modelo, carregar_modelo, salvar_modelo
+from previsao import (
+    COLUNAS, SEQ_LENGTH, CONFIG_MODELO, montar_features, treinar_modelo, direction_accuracy,
+    desnormalizar_close, carregar_lstm
+)
+
+
+@contextmanager
+def _cronometro(tempos, etapa):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[etapa] = tempos.get(etapa, 0.0) + time.perf_counter() - inicio
+
+
+# Colunas da tabela de resultados, presentes mesmo sem nenhuma dobra ou com todas as dobras com erro
+COLUNAS_RESULTADO = [
+    "ticker", "dobra", "corte", "n_treino", "n_teste", "rmse", "rmse_usd", "acuracia", "reutilizado", "erro",
+    "t_download", "t_features", "t_janelas", "t_treino", "t_inferencia", "segundos", "rss_max_worker_mb",
+]
+
+
+def _rss_max_mb():
+    """Pico de memória residente do processo worker desde que ele subiu; None onde não há resource.
+
+    Workers são reaproveitados entre dobras, então o valor inclui os picos de dobras anteriores do mesmo worker.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    return pico / 2**20 if sys.platform == "darwin" else pico / 1024
+
+
+def carregar_fixture(diretorio, ticker):
+    """Lê OHLCV de <diretorio>/<ticker>.csv (coluna Date + COLUNAS_OHLCV)."""
+    caminho = os.path.join(diretorio, f"{ticker}.csv")
+    data = pd.read_csv(caminho, index_col=0, parse_dates=True)
+    return data[COLUNAS_OHLCV].astype(np.float64)
+
+
+def salvar_fixtures(diretorio, tickers, start_date="2023-01-01"):
+    """Copia o histórico do cache local (baixando se necessário) para CSVs reutilizáveis offline."""
+    os.makedirs(diretorio, exist_ok=True)
+    for ticker in list(tickers) + [TICKER_DOLAR]:
+        obter_historico(ticker, start_date).to_csv(os.path.join(diretorio, f"{ticker}.csv"))
+
+
+def preparar_ticker(ticker, fixtures=None, start_date="2023-01-01"):
+    """Monta as features de um ticker e mede o tempo de download e de cálculo dos indicadores."""
+    tempos = {}
+    with _cronometro(tempos, "download"):
+        if fixtures:
+            historico = carregar_fixture(fixtures, ticker)
+            try:
+                dollar_close = carregar_fixture(fixtures, TICKER_DOLAR)['Close']
+            except OSError:
+                dollar_close = None
+        else:
+            historico = obter_historico(ticker, start_date)
+            dollar_close = obter_historico(TICKER_DOLAR, start_date)['Close']
+    with _cronometro(tempos, "features"):
+        data = montar_features(historico, calcular_indicadores(historico['Close']), dollar_close)
+    return data, tempos
+
+
+def dobras(n_linhas, n_dobras, passo, horizonte=1, janela_treino=None):
+    """Cortes walk-forward: cada dobra treina até `corte` e testa os `passo` candles seguintes.
+
+    Retorna (inicio, corte, fim) em índices de linha; o treino usa as linhas [inicio, corte).
+    """
+    resultado = []
+    for k in range(n_dobras):
+        corte = n_linhas - (n_dobras - k) * passo
+        inicio = 0 if janela_treino is None else max(0, corte - janela_treino)
+        fim = min(n_linhas, corte + passo + horizonte - 1)
+        if corte - inicio > 2 * SEQ_LENGTH:
+            resultado.append((inicio, corte, fim))
+    return resultado
+
+
+def executar_dobra(ticker, dobra, data, inicio, corte, fim, horizonte=1, reutilizar=True):
+    """Treina (ou reaproveita) e avalia uma dobra; devolve métricas, tempos por etapa e memória."""
+    inicio_total = time.perf_counter()
+    tempos = {}
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    data_corte = data.index[corte - 1].strftime("%Y-%m-%d")
+    config = dict(CONFIG_MODELO, output_size=horizonte)
+    familia = familia_modelo(ticker, COLUNAS, SEQ_LENGTH, dict(config, backtest=True, inicio=str(data.index[inicio].date())))
+    chave = chave_modelo(familia, data_corte)
+
+    with _cronometro(tempos, "treino"):
+        registro = carregar_modelo(chave, idade_maxima=None) if reutilizar else None
+
+    with _cronometro(tempos, "janelas"):
+        valores = data.values[inicio:fim]
+        limite_treino = corte - inicio
+        # Scaler ajustado só com dados até o corte, para não vazar informação do período de teste;
+        # com modelo reaproveitado, as janelas usam o scaler salvo com ele
+        scaler = registro[1] if registro is not None else MinMaxScaler().fit(valores[:limite_treino])
+        X, y = criar_janelas(scaler.transform(valores), SEQ_LENGTH, horizonte)
+
+        # Janela i tem alvos nas linhas i+SEQ_LENGTH .. i+SEQ_LENGTH+horizonte-1
+        n_treino = limite_treino - SEQ_LENGTH - horizonte + 1
+        n_val = max(1, int(n_treino * 0.15))
+        X_train, y_train = X[:n_treino - n_val], y[:n_treino - n_val]
+        X_val, y_val = X[n_treino - n_val:n_treino], y[n_treino - n_val:n_treino]
+        inicio_teste = limite_treino - SEQ_LENGTH
+        X_test, y_test = X[inicio_teste:], y[inicio_teste:]
+
+    with _cronometro(tempos, "treino"):
+        if registro is not None:
+            model = carregar_lstm(registro[0], X.shape[2], device)
+        else:
+            model, _ = treinar_modelo(X_train, y_train, X_val, y_val, device, exibir_log=False)
+            salvar_modelo(chave, model.state_dict(), scaler, {"ticker": ticker, "familia": familia}, max_versoes=None)
+
+    with _cronometro(tempos, "inferencia"):
+        with torch.no_grad():
+            previsto = model(para_tensor(X_test).to(device)).cpu().numpy()[:, :1]
+        real = y_test[:, :1]
+
+    rmse = float(np.sqrt(np.mean((real - previsto) ** 2)))
+    erro_usd = desnormalizar_close(real, scaler) - desnormalizar_close(previsto, scaler)
+    return dict(
+        ticker=ticker,
+        dobra=dobra,
+        corte=data_corte,
+        n_treino=len(X_train),
+        n_teste=len(X_test),
+        rmse=rmse,
+        rmse_usd=float(np.sqrt(np.mean(erro_usd ** 2))),
+        acuracia=float(direction_accuracy(real, previsto)),
+        reutilizado=registro is not None,
+        erro=None,
+        **{f"t_{etapa}": segundos for etapa, segundos in tempos.items()},
+        segundos=time.perf_counter() - inicio_total,
+        rss_max_worker_mb=_rss_max_mb(),
+    )
+
+
+def executar_backtest(tickers=None, fixtures=None, n_dobras=5, passo=20, horizonte=1, janela_treino=None,
+                      max_workers=None, threads_torch=1, reutilizar=True, exibir_log=False):
+    """Backtest walk-forward em vários tickers, com as dobras executadas em paralelo."""
+    tickers = list(tickers or TICKERS_VALIDOS)
+    inicio_total = time.perf_counter()
+
+    preparados = {}
+    for ticker in tickers:
+        try:
+            preparados[ticker] = preparar_ticker(ticker, fixtures)
+        except Exception as e:
+            print(f"Aviso: {ticker} ignorado no backtest: {e}")
+
+    tarefas = [
+        (ticker, k, data, inicio, corte, fim)
+        for ticker, (data, _) in preparados.items()
+        for k, (inicio, corte, fim) in enumerate(dobras(len(data), n_dobras, passo, horizonte, janela_treino))
+    ]
+    if max_workers is None:
+        max_workers = max(1, min(len(tarefas), (os.cpu_count() or 1) // max(1, threads_torch)))
+
+    linhas = []
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=contexto,
+                             initializer=inicializar_processo, initargs=(threads_torch,)) as executor:
+        futuros = {
+            executor.submit(executar_dobra, ticker, k, data, inicio, corte, fim, horizonte, reutilizar): (ticker, k)
+            for ticker, k, data, inicio, corte, fim in tarefas
+        }
+        for futuro in as_completed(futuros):
+            ticker, k = futuros[futuro]
+            try:
+                linha = futuro.result()
+            except Exception as e:
+                # Uma dobra com erro não derruba o backtest: sai na tabela com a mensagem
+                linha = {"ticker": ticker, "dobra": k, "reutilizado": False, "erro": str(e)}
+            linha.update({f"t_{etapa}": segundos for etapa, segundos in preparados[ticker][1].items()})
+            if exibir_log:
+                if linha["erro"] is None:
+                    print(f"{ticker} dobra {k}: RMSE {linha['rmse']:.4f}, "
+                          f"acurácia {linha['acuracia']:.2%} ({linha['segundos']:.1f}s)")
+                else:
+                    print(f"{ticker} dobra {k}: erro: {linha['erro']}")
+            linhas.append(linha)
+
+    resultados = pd.DataFrame(linhas).reindex(columns=COLUNAS_RESULTADO)
+    resultados = resultados.sort_values(["ticker", "dobra"]).reset_index(drop=True)
+    resultados.attrs["segundos_total"] = time.perf_counter() - inicio_total
+    return resultados
+
+
+def resumir(resultados):
+    """Médias por ticker das métricas e tempos das dobras; colunas ausentes ou vazias são ignoradas."""
+    grupos = resultados.groupby("ticker")
+    colunas = [c for c in resultados.columns
+               if (c in ("rmse", "rmse_usd", "acuracia", "segundos") or c.startswith("t_")) and resultados[c].notna().any()]
+    resumo = grupos[colunas].mean()
+    resumo["dobras"] = grupos.size()
+    if "reutilizado" in resultados:
+        resumo["reutilizados"] = grupos["reutilizado"].sum()
+    if "erro" in resultados:
+        resumo["erros"] = grupos["erro"].count()
+    if "rss_max_worker_mb" in resultados and resultados["rss_max_worker_mb"].notna().any():
+        # Pico por worker (ver _rss_max_mb), não por dobra
+        resumo["rss_max_worker_mb"] = grupos["rss_max_worker_mb"].max()
+    return resumo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest walk-forward do modelo LSTM.")
+    parser.add_argument("tickers", nargs="*", help="Tickers a avaliar (padrão: todos os válidos)")
+    parser.add_argument("--fixtures", help="Diretório com <ticker>.csv para rodar offline")
+    parser.add_argument("--salvar-fixtures", help="Grava o histórico atual dos tickers como fixtures e sai")
+    parser.add_argument("--dobras", type=int, default=5)
+    parser.add_argument("--passo", type=int, default=20, help="Candles de teste por dobra")
+    parser.add_argument("--horizonte", type=int, default=1)
+    parser.add_argument("--janela-treino", type=int, default=None, help="Linhas de treino por dobra (padrão: expansiva)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1, help="Threads do torch por processo")
+    parser.add_argument("--sem-cache", action="store_true", help="Treina todas as dobras novamente")
+    parser.add_argument("--saida", help="Grava os resultados por dobra em CSV")
+    args = parser.parse_args()
+
+    tickers = [t.upper() for t in args.tickers] or list(TICKERS_VALIDOS)
+    if args.salvar_fixtures:
+        salvar_fixtures(args.salvar_fixtures, tickers)
+    else:
+        resultados = executar_backtest(
+            tickers, args.fixtures, args.dobras, args.passo, args.horizonte, args.janela_treino,
+            args.workers, args.threads, reutilizar=not args.sem_cache, exibir_log=True
+        )
+        if args.saida:
+            resultados.to_csv(args.saida, index=False)
+        print(resumir(resultados).to_string())
+        print(f"\nTempo total: {resultados.attrs['segundos_total']:.1f}s")
@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+
+
+def _cronometrar(funcao, repeticoes=3):
+    melhor = float("inf")
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def benchmark_relevancia(n_entradas=5000, semente=42):
+    """Compara o filtro antigo (any/in por ticker) com o classificador de passada única."""
+    from configuracao import TICKERS_VALIDOS, TERMOS_INGLES
+    from relevancia import PALAVRAS_RELEVANTES, PALAVRAS_IGNORAR, classificador_padrao, normalizar
+
+    gerador = random.Random(semente)
+    termos = [(t, n, TERMOS_INGLES.get(n, n.lower())) for t, n in TICKERS_VALIDOS.items()]
+    vocabulario = ("the of and em de para com sobre weather exports rally slump analysts "
+                   "investidores semana trade china brasil").split()
+    entradas = []
+    for _ in range(n_entradas):
+        palavras = gerador.choices(vocabulario, k=12)
+        palavras.append(gerador.choice(termos)[gerador.choice([1, 2])])
+        palavras.append(gerador.choice(PALAVRAS_RELEVANTES))
+        if gerador.random() < 0.1:
+            palavras.append(gerador.choice(PALAVRAS_IGNORAR))
+        gerador.shuffle(palavras)
+        entradas.append({"titulo": " ".join(palavras[:8]), "resumo": " ".join(palavras[8:])})
+
+    def antigo():
+        resultado = {}
+        for ticker, termo, termo_ingles in termos:
+            for entrada in entradas:
+                content = (entrada["titulo"] + " " + entrada["resumo"]).lower()
+                if (termo.lower() in content or termo_ingles.lower() in content) and \
+                   any(palavra in content for palavra in PALAVRAS_RELEVANTES) and \
+                   not any(palavra in content for palavra in PALAVRAS_IGNORAR):
+                    resultado.setdefault(ticker, []).append(entrada)
+        return resultado
+
+    classificador = classificador_padrao()
+    tempo_antigo, resultado_antigo = _cronometrar(antigo)
+    tempo_novo, resultado_novo = _cronometrar(lambda: classificador.classificar_lote(entradas))
+
+    acertos_antigo = sum(len(v) for v in resultado_antigo.values())
+    acertos_novo = sum(len(v) for v in resultado_novo.values())
+    print(f"{n_entradas} entradas x {len(termos)} tickers")
+    print(f"  any/in por ticker:   {tempo_antigo * 1000:8.1f} ms  ({acertos_antigo} classificações)")
+    print(f"  classificador único: {tempo_novo * 1000:8.1f} ms  ({acertos_novo} classificações)")
+    print(f"  ganho: {tempo_antigo / tempo_novo:.1f}x")
+    # O classificador ignora acentos, então pode encontrar mais resultados que o filtro antigo
+    print(f"  diferença de classificações (insensível a acentos): {acertos_novo - acertos_antigo}")
+
+    # Entrada a entrada, contra a regra antiga aplicada ao texto sem acentos: deve dar zero
+    relevantes = [normalizar(p) for p in PALAVRAS_RELEVANTES]
+    ignorar = [normalizar(p) for p in PALAVRAS_IGNORAR]
+    divergentes = 0
+    for entrada in entradas:
+        conteudo = normalizar(entrada["titulo"] + " " + entrada["resumo"])
+        esperado = set()
+        if any(p in conteudo for p in relevantes) and not any(p in conteudo for p in ignorar):
+            esperado = {t for t, termo, ingles in termos if normalizar(termo) in conteudo or normalizar(ingles) in conteudo}
+        divergentes += classificador.classificar(entrada["titulo"] + " " + entrada["resumo"]) != esperado
+    print(f"  entradas com classificação divergente: {divergentes}")
+
+
+def _pagina_sintetica(n_blocos=3000, semente=42):
+    """Página grande com manchetes em vários formatos misturadas a muito conteúdo irrelevante."""
+    gerador = random.Random(semente)
+    partes = ["<html><head><script>var x = 1;</script></head><body>"]
+    for i in range(n_blocos):
+        sorteio = gerador.random()
+        if sorteio < 0.2:
+            partes.append(f"<article><h3><a href='/n/{i}'>Manchete {i} <b>café</b></a></h3><p>{'texto ' * 30}</p></article>")
+        elif sorteio < 0.3:
+            partes.append(f"<div class='Card-title'><a href='https://exemplo.com/{i}'>Card {i}</a></div>")
+        elif sorteio < 0.4:
+            partes.append(f"<h2 class='post-title teaser__title'><a href='rel/{i}'>Post {i}</a></h2>")
+        else:
+            partes.append(f"<div><ul><li><span>{'lorem ipsum ' * 20}</span></li></ul><img src='x.png'></div>")
+    partes.append("</body></html>")
+    return "".join(partes)
+
+
+def _carregar_fixtures_html(diretorio):
+    """Arquivos <host>.html do diretório, como pares (url, html)."""
+    paginas = []
+    for nome in sorted(os.listdir(diretorio)):
+        if nome.endswith(".html"):
+            with open(os.path.join(diretorio, nome), encoding="utf-8", errors="replace") as f:
+                paginas.append((f"https://{nome[:-len('.html')]}/", f.read()))
+    return paginas
+
+
+def salvar_fixtures_html(diretorio):
+    """Baixa as páginas de URLS_SCRAPING para <diretorio>/<host>.html."""
+    from urllib.parse import urlparse
+    from coletor import baixar
+    from noticias import URLS_SCRAPING
+
+    os.makedirs(diretorio, exist_ok=True)
+    for url in URLS_SCRAPING:
+        try:
+            response = baixar(url)
+            with open(os.path.join(diretorio, urlparse(url).hostname + ".html"), "w", encoding="utf-8") as f:
+                f.write(response.text)
+        except Exception as e:
+            print(f"Aviso: {url} não foi salvo: {e}")
+
+
+def benchmark_html(fixtures=None):
+    """Extração de manchetes: parse completo com html.parser (antigo) x parse parcial em cada backend instalado."""
+    from bs4 import BeautifulSoup
+    from extracao import BACKENDS, backend_disponivel, extrair, seletor_para
+
+    if fixtures:
+        paginas = _carregar_fixtures_html(fixtures)
+    else:
+        html = _pagina_sintetica()
+        paginas = [(url, html) for url in ("https://www.reuters.com/", "https://www.cnbc.com/", "https://www.valor.com.br/")]
+    paginas = [(url, html) for url, html in paginas if seletor_para(url)]
+    megabytes = sum(len(html) for _, html in paginas) / 1e6
+
+    def antigo():
+        return sum(len(BeautifulSoup(html, "html.parser").select(seletor_para(url))) for url, html in paginas)
+
+    tempo_antigo, total_antigo = _cronometrar(antigo)
+    print(f"{len(paginas)} páginas, {megabytes:.1f} MB")
+    print(f"  html.parser completo:  {tempo_antigo * 1000:8.1f} ms  ({total_antigo} manchetes)")
+    for backend in BACKENDS:
+        if not backend_disponivel(backend):
+            print(f"  {backend:<21} não instalado")
+            continue
+        tempo, total = _cronometrar(lambda: sum(len(extrair(url, html, backend)) for url, html in paginas))
+        print(f"  {backend + ' parcial:':<22} {tempo * 1000:8.1f} ms  ({total} manchetes, {tempo_antigo / tempo:.1f}x)")
+
+
+def _treino_legado(X_train, y_train, X_val, y_val, epochs):
+    """Laço de treino anterior (DataLoader, loss.item() por lote, validação via NumPy), para comparação."""
+    import numpy as np
+    import torch
+    from torch.utils.data import DataLoader, TensorDataset
+    from previsao import LSTMModel, CONFIG_MODELO
+
+    loader = DataLoader(TensorDataset(torch.from_numpy(np.array(X_train)), torch.from_numpy(np.array(y_train))),
+                        batch_size=32, shuffle=True)
+    model = LSTMModel(input_size=X_train.shape[2], **CONFIG_MODELO)
+    criterion = torch.nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.0003)
+    X_val_tensor = torch.from_numpy(np.array(X_val))
+    for _ in range(epochs):
+        model.train()
+        epoch_loss = 0
+        for xb, yb in loader:
+            optimizer.zero_grad()
+            loss = criterion(model(xb), yb)
+            loss.backward()
+            optimizer.step()
+            epoch_loss += loss.item()
+        model.eval()
+        with torch.no_grad():
+            val_out = model(X_val_tensor).numpy()
+        float(np.mean((val_out - y_val) ** 2))
+
+
+def benchmark_treino(n_linhas=700, epochs=5, tamanhos_lote=(32, 128), threads=None, semente=42):
+    """Épocas por segundo do laço antigo e do novo (lotes de índices, perdas no dispositivo), em CPU."""
+    import numpy as np
+    import torch
+    from previsao import preprocessar_dados, dividir_dados, treinar_modelo, configurar_threads, COLUNAS
+
+    # O mesmo gancho do treino: --threads, senão COMODOS_THREADS_TORCH; aplicado antes do laço legado também
+    configurar_threads(threads)
+    gerador = np.random.default_rng(semente)
+    dados = 100 + np.cumsum(gerador.normal(0, 1, (n_linhas, len(COLUNAS))), axis=0)
+    X, y, _ = preprocessar_dados(dados)
+    X_train, X_val, _, y_train, y_val, _ = dividir_dados(X, y)
+    device = torch.device("cpu")
+
+    print(f"{len(X_train)} janelas de treino, {epochs} épocas, {torch.get_num_threads()} threads")
+    torch.manual_seed(semente)
+    segundos, _ = _cronometrar(lambda: _treino_legado(X_train, y_train, X_val, y_val, epochs), repeticoes=1)
+    referencia = epochs / segundos
+    print(f"  DataLoader (lote 32):        {referencia:6.2f} épocas/s")
+    for tamanho in tamanhos_lote:
+        torch.manual_seed(semente)
+        # patience alta: mede sempre o mesmo número de épocas
+        segundos, (_, val_loss) = _cronometrar(lambda: treinar_modelo(
+            X_train, y_train, X_val, y_val, device, exibir_log=False, epochs=epochs, patience=epochs + 1,
+            tamanho_lote=tamanho), repeticoes=1)
+        print(f"  índices embaralhados (lote {tamanho:>3}): {epochs / segundos:6.2f} épocas/s "
+              f"({epochs / segundos / referencia:.2f}x, val MSE {val_loss:.5f})")
+
+
+# Pontos de entrada medidos; o orçamento de cada um é verificado em tests/test_importacao.py
+PONTOS_DE_ENTRADA = ("configuracao", "metricas", "tarefas", "noticias", "instantaneos", "previsao")
+PESADOS = ("torch", "sklearn", "matplotlib", "yfinance", "pandas", "numpy", "requests", "bs4", "feedparser", "streamlit")
+
+
+def importar_em_processo_novo(modulo, diretorio=None):
+    """[segundos, dependências de PESADOS carregadas] ao importar o módulo em um interpretador novo."""
+    codigo = (
+        "import sys, time, json\n"
+        "inicio = time.perf_counter()\n"
+        f"import {modulo}\n"
+        "segundos = time.perf_counter() - inicio\n"
+        f"print(json.dumps([segundos, [m for m in {list(PESADOS)!r} if m in sys.modules]]))\n"
+    )
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True,
+                           cwd=diretorio or os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def benchmark_importacao(repeticoes=3):
+    """Tempo de importação a frio de cada ponto de entrada, em um interpretador novo por medição."""
+    for modulo in PONTOS_DE_ENTRADA:
+        medicoes = [importar_em_processo_novo(modulo) for _ in range(repeticoes)]
+        segundos = min(m[0] for m in medicoes)
+        print(f"  {modulo:<14} {segundos * 1000:8.1f} ms  [{', '.join(medicoes[0][1]) or '-'}]")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks do Commodos.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    relevancia = subparsers.add_parser("relevancia", help="Filtro de relevância de notícias")
+    relevancia.add_argument("--entradas", type=int, default=5000)
+
+    importacao = subparsers.add_parser("importacao", help="Tempo de importação a frio dos pontos de entrada")
+    importacao.add_argument("--repeticoes", type=int, default=3)
+
+    treino = subparsers.add_parser("treino", help="Épocas por segundo do treino em CPU")
+    treino.add_argument("--linhas", type=int, default=700)
+    treino.add_argument("--epocas", type=int, default=5)
+    treino.add_argument("--lotes", type=int, nargs="+", default=[32, 128])
+    treino.add_argument("--threads", type=int, default=None)
+
+    html = subparsers.add_parser("html", help="Extração de manchetes das páginas de notícias")
+    html.add_argument("--fixtures", help="Diretório com <host>.html salvos (padrão: página sintética)")
+    html.add_argument("--salvar", help="Baixa as páginas atuais para este diretório e sai")
+
+    args = parser.parse_args()
+    if args.benchmark == "relevancia":
+        benchmark_relevancia(args.entradas)
+    elif args.benchmark == "html":
+        if args.salvar:
+            salvar_fixtures_html(args.salvar)
+        else:
+            benchmark_html(args.fixtures)
+    elif args.benchmark == "treino":
+        benchmark_treino(args.linhas, args.epocas, args.lotes, args.threads)
+    elif args.benchmark == "importacao":
+        benchmark_importacao(args.repeticoes)
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from configuracao import DIRETORIO_CACHE
+from coletor import baixar
+from metricas import incrementar
+from arquivos import gravar_json
+
+DIRETORIO_HTTP = os.path.join(DIRETORIO_CACHE, "http")
+
+# Por quanto tempo (em segundos) uma fonte é servida do cache sem consultar o servidor
+TTL_PADRAO = int(os.environ.get("COMODOS_TTL_NOTICIAS", 15 * 60))
+# Número máximo de fontes mantidas em disco; as menos usadas são descartadas
+MAX_REGISTROS = int(os.environ.get("COMODOS_CACHE_HTTP_MAX", 256))
+
+_travas = {}
+_trava_global = threading.Lock()
+
+
+def _trava(url):
+    with _trava_global:
+        return _travas.setdefault(url, threading.Lock())
+
+
+def _caminho(url):
+    return os.path.join(DIRETORIO_HTTP, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def _ler(url):
+    caminho = _caminho(url)
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            registro = json.load(f)
+        # O mtime marca o último acesso e orienta o descarte LRU
+        os.utime(caminho)
+        return registro
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar(url, registro):
+    os.makedirs(DIRETORIO_HTTP, exist_ok=True)
+    gravar_json(_caminho(url), registro, ensure_ascii=False)
+    _podar()
+
+
+def _podar():
+    try:
+        arquivos = [os.path.join(DIRETORIO_HTTP, nome) for nome in os.listdir(DIRETORIO_HTTP) if nome.endswith(".json")]
+        if len(arquivos) <= MAX_REGISTROS:
+            return
+        arquivos.sort(key=os.path.getmtime)
+        for caminho in arquivos[:len(arquivos) - MAX_REGISTROS]:
+            os.remove(caminho)
+    except OSError:
+        pass
+
+
+def obter_entradas(url, extrair, limite=None, ttl=TTL_PADRAO):
+    """Retorna as entradas já extraídas de url, usando o cache em disco e GET condicional.
+
+    extrair recebe a resposta HTTP e devolve uma lista serializável em JSON.
+    """
+    # Uma requisição por URL por vez: chamadas simultâneas para outras commodities reaproveitam o resultado
+    with _trava(url):
+        registro = _ler(url)
+        agora = time.time()
+        if registro is not None and agora - registro["obtido_em"] < ttl:
+            incrementar("cache_http", resultado="fresco")
+            return registro["entradas"]
+
+        headers = {}
+        if registro is not None:
+            if registro.get("etag"):
+                headers["If-None-Match"] = registro["etag"]
+            if registro.get("last_modified"):
+                headers["If-Modified-Since"] = registro["last_modified"]
+
+        try:
+            response = baixar(url, limite, headers=headers)
+        except Exception as e:
+            if registro is None:
+                raise
+            incrementar("cache_http", resultado="obsoleto")
+            print(f"Aviso: Falha ao atualizar {url}, usando cache: {e}")
+            return registro["entradas"]
+
+        if response.status_code == 304 and registro is not None:
+            incrementar("cache_http", resultado="nao_modificado")
+            registro["obtido_em"] = agora
+            _gravar(url, registro)
+            return registro["entradas"]
+
+        if response.status_code != 200:
+            print(f"Aviso: Erro HTTP {response.status_code} ao acessar {url}")
+            return registro["entradas"] if registro is not None else []
+
+        incrementar("cache_http", resultado="baixado")
+        entradas = extrair(response)
+        _gravar(url, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "obtido_em": agora,
+            "entradas": entradas,
+        })
+        return entradas
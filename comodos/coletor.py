@@ -0,0 +1,101 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+from metricas import cronometrar, incrementar
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Referer": "https://www.google.com/"
+}
+
+TIMEOUT = 15
+MAX_WORKERS = int(os.environ.get("COMODOS_COLETOR_WORKERS", 12))
+# Intervalo mínimo entre requisições ao mesmo host (substitui o sleep global)
+INTERVALO_POR_HOST = float(os.environ.get("COMODOS_INTERVALO_HOST", 1.0))
+# Prazo total de uma coleta; fontes que não terminarem a tempo são descartadas
+PRAZO_PADRAO = float(os.environ.get("COMODOS_PRAZO_NOTICIAS", 20.0))
+
+
+class LimitadorPorHost:
+    def __init__(self, intervalo=INTERVALO_POR_HOST):
+        self.intervalo = intervalo
+        self._proximo = {}
+        self._trava = threading.Lock()
+
+    def aguardar(self, url, limite=None):
+        """Reserva o próximo horário livre do host; retorna False se ele cair depois do limite."""
+        host = urlparse(url).netloc
+        with self._trava:
+            agora = time.monotonic()
+            horario = max(agora, self._proximo.get(host, 0.0))
+            if limite is not None and horario >= limite:
+                return False
+            self._proximo[host] = horario + self.intervalo
+        if horario > agora:
+            incrementar("espera_limitador_segundos", horario - agora, host=host)
+            time.sleep(horario - agora)
+        return True
+
+
+_limitador = LimitadorPorHost()
+_sessao = None
+_trava_sessao = threading.Lock()
+
+
+def obter_sessao():
+    """Sessão compartilhada com pool de conexões (keep-alive entre requisições ao mesmo host)."""
+    global _sessao
+    with _trava_sessao:
+        if _sessao is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=32, pool_maxsize=MAX_WORKERS)
+            sessao.mount("http://", adaptador)
+            sessao.mount("https://", adaptador)
+            sessao.headers.update(HEADERS)
+            _sessao = sessao
+        return _sessao
+
+
+def baixar(url, limite=None, headers=None):
+    if not _limitador.aguardar(url, limite):
+        raise TimeoutError("prazo esgotado antes da requisição")
+    timeout = TIMEOUT
+    if limite is not None:
+        timeout = max(0.5, min(TIMEOUT, limite - time.monotonic()))
+    host = urlparse(url).netloc
+    with cronometrar("http_requisicao", host=host):
+        response = obter_sessao().get(url, headers=headers, timeout=timeout, allow_redirects=True)
+    incrementar("http_respostas", host=host, status=response.status_code)
+    return response
+
+
+def coletar(tarefas, prazo=PRAZO_PADRAO, max_workers=MAX_WORKERS):
+    """Executa processar(url, limite) para cada par (url, processar) em paralelo.
+
+    Retorna {url: resultado} na ordem das tarefas, apenas com as que terminaram dentro do prazo.
+    """
+    limite = time.monotonic() + prazo
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="coletor")
+    futuros = {executor.submit(processar, url, limite): url for url, processar in tarefas}
+    concluidos, pendentes = wait(futuros, timeout=prazo)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    resultados = {}
+    for futuro in concluidos:
+        url = futuros[futuro]
+        try:
+            resultados[url] = futuro.result()
+        except Exception as e:
+            incrementar("fontes_falhas", url=url, motivo="erro")
+            print(f"Aviso: Erro ao acessar {url}: {e}")
+    for futuro in pendentes:
+        incrementar("fontes_falhas", url=futuros[futuro], motivo="prazo")
+        print(f"Aviso: Prazo esgotado ao acessar {futuros[futuro]}")
+
+    return {url: resultados[url] for url, _ in tarefas if url in resultados}
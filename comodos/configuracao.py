@@ -0,0 +1,47 @@
+import os
+
+# Diretório de dados em cache (preços, modelos treinados, notícias)
+DIRETORIO_CACHE = os.environ.get(
+    "COMODOS_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+)
+
+# Dias à frente previstos para o painel; o lote e os instantâneos usam o mesmo valor para aquecer
+# exatamente as entradas do registro de modelos que o app lê
+HORIZONTE_PAINEL = int(os.environ.get("COMODOS_HORIZONTE_PAINEL", 10))
+
+# Dicionário completo de tickers válidos
+TICKERS_VALIDOS = {
+    # Metais
+    "GC=F": "Ouro", "SI=F": "Prata", "PL=F": "Platina", "PA=F": "Paládio", "HG=F": "Cobre",
+    # Energia
+    "CL=F": "Petróleo WTI", "BZ=F": "Petróleo Brent", "NG=F": "Gás Natural",
+    "RB=F": "Gasolina RBOB", "HO=F": "Óleo de Aquecimento",
+    # Grãos e Agricultura
+    "ZC=F": "Milho", "ZS=F": "Soja", "ZW=F": "Trigo", "KE=F": "Trigo Vermelho",
+    "ZM=F": "Farelo de Soja", "ZL=F": "Óleo de Soja", "ZO=F": "Aveia",
+    # Carnes
+    "LE=F": "Gado Vivo", "HE=F": "Carne de Porco", "GF=F": "Gado de Corte",
+    # Soft Commodities
+    "SB=F": "Açúcar", "CC=F": "Cacau", "KC=F": "Café Arábica", "CT=F": "Algodão",
+    "OJ=F": "Suco de Laranja", "LBS=F": "Madeira"
+}
+
+# Termo em inglês usado na busca de notícias para cada commodity
+TERMOS_INGLES = {
+    # Metais
+    "Ouro": "gold", "Prata": "silver", "Platina": "platinum", "Paládio": "palladium", "Cobre": "copper",
+    # Energia
+    "Petróleo WTI": "WTI oil", "Petróleo Brent": "Brent oil", "Gás Natural": "natural gas",
+    "Gasolina RBOB": "gasoline", "Óleo de Aquecimento": "heating oil",
+    # Grãos e Agricultura
+    "Milho": "corn", "Soja": "soybean", "Trigo": "wheat", "Trigo Vermelho": "red wheat",
+    "Farelo de Soja": "soybean meal", "Óleo de Soja": "soybean oil", "Aveia": "oats",
+    # Carnes
+    "Gado Vivo": "live cattle", "Carne de Porco": "lean hogs", "Gado de Corte": "feeder cattle",
+    # Soft Commodities
+    "Açúcar": "sugar", "Cacau": "cocoa", "Café Arábica": "coffee", "Algodão": "cotton",
+    "Suco de Laranja": "orange juice", "Madeira": "lumber",
+    # Outros
+    "Índice Dólar": "dollar index"
+}
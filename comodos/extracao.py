@@ -0,0 +1,99 @@
+import os
+import re
+import json
+import importlib.util
+from functools import lru_cache
+from urllib.parse import urljoin, urlparse
+
+# Host -> seletores CSS das manchetes; novas fontes entram editando o JSON, sem mudar código
+CAMINHO_SELETORES = os.environ.get(
+    "COMODOS_SELETORES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "seletores.json")
+)
+# "selectolax", "lxml" ou "html.parser"; vazio escolhe o mais rápido instalado
+PARSER_HTML = os.environ.get("COMODOS_PARSER_HTML", "")
+
+BACKENDS = ("selectolax", "lxml", "html.parser")
+_ATRIBUTOS = re.compile(r"\[[^\]]*\]")
+_DESCENDENTE = re.compile(r"\s*>\s*|\s+")
+_COMPOSTO = re.compile(r"([a-zA-Z][a-zA-Z0-9-]*)(?:[.#\[].*)?")
+
+
+@lru_cache(maxsize=None)
+def carregar_registro(caminho=CAMINHO_SELETORES):
+    with open(caminho, encoding="utf-8") as f:
+        return {host.lower(): seletor for host, seletor in json.load(f).items()}
+
+
+def seletor_para(url, registro=None):
+    """Seletor do host da URL ou do domínio pai mais próximo registrado (www.reuters.com -> reuters.com)."""
+    registro = carregar_registro() if registro is None else registro
+    partes = (urlparse(url).hostname or "").lower().split(".")
+    for i in range(len(partes) - 1):
+        seletor = registro.get(".".join(partes[i:]))
+        if seletor:
+            return seletor
+    return None
+
+
+@lru_cache(maxsize=None)
+def tags_do_seletor(seletor):
+    """Nomes de tag do seletor para o parse parcial, ou None quando ele exige o documento inteiro.
+
+    O parse parcial só constrói essas tags (e o que houver dentro), então cada composto precisa de um
+    nome de tag (".story a" perderia o ancestral) e só valem os combinadores de descendência: irmãos
+    (+, ~) e pseudo-classes (:first-child) dependem de nós que o parse parcial descartaria.
+    """
+    seletor = _ATRIBUTOS.sub("[]", seletor)
+    if any(c in seletor for c in ":+~*"):
+        return None
+    tags = set()
+    for parte in seletor.split(","):
+        for composto in _DESCENDENTE.split(parte.strip()):
+            casamento = _COMPOSTO.fullmatch(composto)
+            if casamento is None:
+                return None
+            tags.add(casamento.group(1).lower())
+    return frozenset(tags) or None
+
+
+def backend_disponivel(nome):
+    if nome == "html.parser":
+        return True
+    return importlib.util.find_spec(nome) is not None
+
+
+@lru_cache(maxsize=None)
+def backend_padrao():
+    if PARSER_HTML:
+        return PARSER_HTML
+    return next(nome for nome in BACKENDS if backend_disponivel(nome))
+
+
+def _selecionar_selectolax(html, seletor):
+    from selectolax.parser import HTMLParser
+    return [(no.text() or "", no.attributes.get("href") or "") for no in HTMLParser(html).css(seletor)]
+
+
+def _selecionar_bs4(html, seletor, parser):
+    from bs4 import BeautifulSoup, SoupStrainer
+    tags = tags_do_seletor(seletor)
+    soup = BeautifulSoup(html, parser, parse_only=SoupStrainer(list(tags)) if tags else None)
+    return [(no.text, no.get("href", "")) for no in soup.select(seletor)]
+
+
+def extrair(url, html, backend=None):
+    """Manchetes da página como entradas {"titulo", "link", "resumo"}; hosts sem seletor retornam []."""
+    seletor = seletor_para(url)
+    if not seletor:
+        return []
+
+    backend = backend or backend_padrao()
+    if backend == "selectolax":
+        encontrados = _selecionar_selectolax(html, seletor)
+    else:
+        encontrados = _selecionar_bs4(html, seletor, backend)
+
+    return [
+        {"titulo": titulo.strip(), "link": urljoin(url, link), "resumo": ""}
+        for titulo, link in encontrados
+    ]
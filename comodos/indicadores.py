@@ -0,0 +1,243 @@
+import os
+import json
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+from configuracao import DIRETORIO_CACHE
+from arquivos import nome_arquivo, gravar_atomico
+
+DIRETORIO_INDICADORES = os.path.join(DIRETORIO_CACHE, "indicadores")
+COLUNAS_INDICADORES = ['Close_MA', 'RSI', 'MACD', 'Volatility']
+
+
+def compute_rsi(data, periods=14):
+    delta = data.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=periods).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=periods).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def compute_macd(data, short=12, long=26, signal=9):
+    exp1 = data.ewm(span=short, adjust=False).mean()
+    exp2 = data.ewm(span=long, adjust=False).mean()
+    macd = exp1 - exp2
+    signal_line = macd.ewm(span=signal, adjust=False).mean()
+    return macd - signal_line
+
+
+def calcular_indicadores(close):
+    """Modo em lote: recalcula todo o histórico com pandas (referência exata)."""
+    return pd.DataFrame({
+        'Close_MA': close.rolling(window=7).mean(),
+        'RSI': compute_rsi(close),
+        'MACD': compute_macd(close),
+        'Volatility': close.rolling(window=14).std(),
+    }, index=close.index)
+
+
+class _JanelaMovel:
+    """Soma e soma dos quadrados de uma janela fixa, atualizadas em O(1).
+
+    Os valores são deslocados por uma referência para evitar cancelamento numérico na
+    variância, e as somas são recalculadas a cada volta completa da janela para não
+    acumular erro de arredondamento.
+    """
+
+    def __init__(self, tamanho, valores=()):
+        self.tamanho = tamanho
+        self.valores = deque(valores, maxlen=tamanho)
+        self._recalcular()
+
+    def _recalcular(self):
+        self.referencia = self.valores[-1] if self.valores else 0.0
+        self.soma = sum(v - self.referencia for v in self.valores)
+        self.soma_quadrados = sum((v - self.referencia) ** 2 for v in self.valores)
+        self._desde_recalculo = 0
+
+    def adicionar(self, valor):
+        if len(self.valores) == self.tamanho:
+            antigo = self.valores[0] - self.referencia
+            self.soma -= antigo
+            self.soma_quadrados -= antigo * antigo
+        self.valores.append(valor)
+        novo = valor - self.referencia
+        self.soma += novo
+        self.soma_quadrados += novo * novo
+        self._desde_recalculo += 1
+        if self._desde_recalculo >= self.tamanho:
+            self._recalcular()
+
+    def media(self):
+        if len(self.valores) < self.tamanho:
+            return math.nan
+        return self.referencia + self.soma / self.tamanho
+
+    def desvio(self):
+        n = len(self.valores)
+        if n < self.tamanho or n < 2:
+            return math.nan
+        variancia = (self.soma_quadrados - self.soma * self.soma / n) / (n - 1)
+        return math.sqrt(max(variancia, 0.0))
+
+
+def _ewm(anterior, valor, alpha):
+    # Mesma recorrência de pandas ewm(adjust=False), inclusive a divisão pelo peso total
+    if anterior is None:
+        return valor
+    return ((1 - alpha) * anterior + alpha * valor) / ((1 - alpha) + alpha)
+
+
+class EstadoIndicadores:
+    """Estado incremental de Close_MA, RSI, MACD e Volatility: cada novo candle custa O(1)."""
+
+    def __init__(self, janela_ma=7, janela_rsi=14, janela_vol=14, curta=12, longa=26, sinal=9):
+        self.parametros = dict(janela_ma=janela_ma, janela_rsi=janela_rsi, janela_vol=janela_vol,
+                               curta=curta, longa=longa, sinal=sinal)
+        self.media = _JanelaMovel(janela_ma)
+        self.volatilidade = _JanelaMovel(janela_vol)
+        self.ganhos = _JanelaMovel(janela_rsi)
+        self.perdas = _JanelaMovel(janela_rsi)
+        self.ultimo_close = None
+        self.ema_curta = None
+        self.ema_longa = None
+        self.ema_sinal = None
+
+    def atualizar(self, close):
+        close = float(close)
+        # O primeiro delta é NaN, e where(delta > 0, 0) o transforma em 0 (ganho e perda)
+        delta = 0.0 if self.ultimo_close is None else close - self.ultimo_close
+        self.ganhos.adicionar(delta if delta > 0 else 0.0)
+        self.perdas.adicionar(-delta if delta < 0 else 0.0)
+        self.media.adicionar(close)
+        self.volatilidade.adicionar(close)
+        self.ultimo_close = close
+
+        p = self.parametros
+        self.ema_curta = _ewm(self.ema_curta, close, 2 / (p["curta"] + 1))
+        self.ema_longa = _ewm(self.ema_longa, close, 2 / (p["longa"] + 1))
+        macd = self.ema_curta - self.ema_longa
+        self.ema_sinal = _ewm(self.ema_sinal, macd, 2 / (p["sinal"] + 1))
+
+        return {
+            'Close_MA': self.media.media(),
+            'RSI': self._rsi(),
+            'MACD': macd - self.ema_sinal,
+            'Volatility': self.volatilidade.desvio(),
+        }
+
+    def _rsi(self):
+        ganho, perda = self.ganhos.media(), self.perdas.media()
+        if math.isnan(ganho) or math.isnan(perda):
+            return math.nan
+        if perda == 0:
+            return 100.0 if ganho > 0 else math.nan
+        return 100 - (100 / (1 + ganho / perda))
+
+    @classmethod
+    def de_serie(cls, close, **parametros):
+        """Reconstrói o estado ao final de uma série já calculada em lote."""
+        estado = cls(**parametros)
+        p = estado.parametros
+        valores = close.to_numpy(dtype=np.float64)
+        if len(valores) == 0:
+            return estado
+
+        delta = np.diff(valores, prepend=np.nan)
+        ganhos = np.where(delta > 0, delta, 0.0)
+        perdas = np.where(delta < 0, -delta, 0.0)
+        estado.ganhos = _JanelaMovel(p["janela_rsi"], ganhos[-p["janela_rsi"]:])
+        estado.perdas = _JanelaMovel(p["janela_rsi"], perdas[-p["janela_rsi"]:])
+        estado.media = _JanelaMovel(p["janela_ma"], valores[-p["janela_ma"]:])
+        estado.volatilidade = _JanelaMovel(p["janela_vol"], valores[-p["janela_vol"]:])
+        estado.ultimo_close = float(valores[-1])
+
+        exp1 = close.ewm(span=p["curta"], adjust=False).mean()
+        exp2 = close.ewm(span=p["longa"], adjust=False).mean()
+        estado.ema_curta = float(exp1.iloc[-1])
+        estado.ema_longa = float(exp2.iloc[-1])
+        estado.ema_sinal = float((exp1 - exp2).ewm(span=p["sinal"], adjust=False).mean().iloc[-1])
+        return estado
+
+    def para_dict(self):
+        return {
+            "parametros": self.parametros,
+            "media": list(self.media.valores),
+            "volatilidade": list(self.volatilidade.valores),
+            "ganhos": list(self.ganhos.valores),
+            "perdas": list(self.perdas.valores),
+            "ultimo_close": self.ultimo_close,
+            "ema_curta": self.ema_curta,
+            "ema_longa": self.ema_longa,
+            "ema_sinal": self.ema_sinal,
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        estado = cls(**dados["parametros"])
+        p = estado.parametros
+        estado.media = _JanelaMovel(p["janela_ma"], dados["media"])
+        estado.volatilidade = _JanelaMovel(p["janela_vol"], dados["volatilidade"])
+        estado.ganhos = _JanelaMovel(p["janela_rsi"], dados["ganhos"])
+        estado.perdas = _JanelaMovel(p["janela_rsi"], dados["perdas"])
+        for campo in ("ultimo_close", "ema_curta", "ema_longa", "ema_sinal"):
+            setattr(estado, campo, dados[campo])
+        return estado
+
+
+def _caminho(ticker):
+    return os.path.join(DIRETORIO_INDICADORES, nome_arquivo(ticker) + ".npz")
+
+
+def _ler(ticker, inicio):
+    try:
+        with np.load(_caminho(ticker)) as arquivo:
+            meta = json.loads(str(arquivo["meta"]))
+            if meta.get("inicio") != inicio:
+                return None
+            datas = pd.to_datetime(arquivo["datas"], unit="D")
+            tabela = pd.DataFrame(arquivo["valores"], index=datas, columns=COLUNAS_INDICADORES)
+        return tabela, EstadoIndicadores.de_dict(meta["estado"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _gravar(ticker, inicio, tabela, estado):
+    os.makedirs(DIRETORIO_INDICADORES, exist_ok=True)
+    gravar_atomico(_caminho(ticker), lambda temporario: np.savez(
+        temporario,
+        datas=tabela.index.values.astype("datetime64[D]").astype(np.int64),
+        valores=tabela[COLUNAS_INDICADORES].to_numpy(dtype=np.float64),
+        meta=np.array(json.dumps({"inicio": inicio, "estado": estado.para_dict()}))
+    ), sufixo=".npz")
+
+
+def obter_indicadores(ticker, close, inicio):
+    """Indicadores de todo o histórico; só os candles posteriores ao último salvo são calculados.
+
+    Se o histórico salvo não for prefixo de close (ex.: o último candle foi revisado),
+    tudo é recalculado em lote.
+    """
+    salvo = _ler(ticker, inicio)
+    if salvo is not None:
+        tabela, estado = salvo
+        ultima_data = tabela.index[-1] if len(tabela) else None
+        consistente = (
+            ultima_data is not None
+            and ultima_data in close.index
+            and close.index.get_loc(ultima_data) == len(tabela) - 1
+            and float(close.loc[ultima_data]) == estado.ultimo_close
+        )
+        if consistente:
+            novos = close[close.index > ultima_data]
+            if novos.empty:
+                return tabela
+            linhas = [estado.atualizar(valor) for valor in novos.to_numpy(dtype=np.float64)]
+            tabela = pd.concat([tabela, pd.DataFrame(linhas, index=novos.index, columns=COLUNAS_INDICADORES)])
+            _gravar(ticker, inicio, tabela, estado)
+            return tabela
+
+    tabela = calcular_indicadores(close)
+    _gravar(ticker, inicio, tabela, EstadoIndicadores.de_serie(close))
+    return tabela
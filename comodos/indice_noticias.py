@@ -0,0 +1,122 @@
+import os
+import re
+import time
+import sqlite3
+from urllib.parse import urlparse, urldefrag
+from configuracao import DIRETORIO_CACHE
+
+CAMINHO_INDICE = os.path.join(DIRETORIO_CACHE, "noticias.sqlite3")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS artigos (
+    id INTEGER PRIMARY KEY,
+    link TEXT NOT NULL UNIQUE,
+    titulo TEXT NOT NULL,
+    resumo TEXT NOT NULL DEFAULT '',
+    fonte TEXT NOT NULL,
+    publicado_em REAL,
+    coletado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artigos_data ON artigos (coalesce(publicado_em, coletado_em));
+CREATE TABLE IF NOT EXISTS ingestoes (
+    id INTEGER PRIMARY KEY,
+    inicio REAL NOT NULL,
+    fim REAL NOT NULL,
+    fontes INTEGER NOT NULL,
+    novos INTEGER NOT NULL
+);
+"""
+
+ESQUEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS artigos_fts USING fts5(
+    titulo, resumo, content='artigos', content_rowid='id', tokenize='unicode61 remove_diacritics 1'
+);
+CREATE TRIGGER IF NOT EXISTS artigos_ai AFTER INSERT ON artigos BEGIN
+    INSERT INTO artigos_fts (rowid, titulo, resumo) VALUES (new.id, new.titulo, new.resumo);
+END;
+CREATE TRIGGER IF NOT EXISTS artigos_ad AFTER DELETE ON artigos BEGIN
+    INSERT INTO artigos_fts (artigos_fts, rowid, titulo, resumo) VALUES ('delete', old.id, old.titulo, old.resumo);
+END;
+"""
+
+_fts_disponivel = None
+
+
+def conectar(caminho=CAMINHO_INDICE):
+    """Abre uma conexão (uma por thread) e garante o esquema."""
+    global _fts_disponivel
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    conexao = sqlite3.connect(caminho, timeout=30)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.executescript(ESQUEMA)
+    if _fts_disponivel is not False:
+        try:
+            conexao.executescript(ESQUEMA_FTS)
+            _fts_disponivel = True
+        except sqlite3.OperationalError:
+            print("Aviso: SQLite sem suporte a FTS5, consultas de notícias usarão LIKE")
+            _fts_disponivel = False
+    return conexao
+
+
+def normalizar_artigo(entrada, fonte, coletado_em):
+    link = urldefrag(entrada["link"].strip())[0]
+    titulo = re.sub(r"\s+", " ", entrada["titulo"]).strip()
+    resumo = re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", entrada.get("resumo") or "")).strip()
+    return (link, titulo, resumo, urlparse(fonte).netloc, entrada.get("publicado_em"), coletado_em)
+
+
+def gravar_artigos(conexao, artigos_por_fonte, inicio):
+    """Insere artigos novos (deduplicados pelo link) e registra a ingestão. Retorna quantos eram novos."""
+    agora = time.time()
+    linhas = [
+        normalizar_artigo(entrada, fonte, agora)
+        for fonte, entradas in artigos_por_fonte.items()
+        for entrada in entradas
+        if entrada.get("titulo") and entrada.get("link")
+    ]
+    with conexao:
+        ultimo_id = conexao.execute("SELECT coalesce(max(id), 0) FROM artigos").fetchone()[0]
+        conexao.executemany(
+            "INSERT OR IGNORE INTO artigos (link, titulo, resumo, fonte, publicado_em, coletado_em) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            linhas
+        )
+        novos = conexao.execute("SELECT count(*) FROM artigos WHERE id > ?", (ultimo_id,)).fetchone()[0]
+        conexao.execute(
+            "INSERT INTO ingestoes (inicio, fim, fontes, novos) VALUES (?, ?, ?, ?)",
+            (inicio, time.time(), len(artigos_por_fonte), novos)
+        )
+    return novos
+
+
+def ultima_ingestao(conexao):
+    linha = conexao.execute("SELECT max(fim) FROM ingestoes").fetchone()
+    return linha[0] if linha and linha[0] is not None else None
+
+
+def _expressao_fts(termos):
+    # Cada termo vira uma frase com prefixo no último token: "café arábica"* casa "café arábica"/"cafés"
+    frases = ['"' + termo.replace('"', '""') + '"*' for termo in termos if termo.strip()]
+    return " OR ".join(frases)
+
+
+def consultar(conexao, termos, limite=200):
+    """Artigos que mencionam algum dos termos, dos mais recentes para os mais antigos."""
+    if _fts_disponivel:
+        cursor = conexao.execute(
+            "SELECT a.titulo, a.link, a.resumo, a.fonte, a.publicado_em, a.coletado_em "
+            "FROM artigos_fts JOIN artigos a ON a.id = artigos_fts.rowid "
+            "WHERE artigos_fts MATCH ? "
+            "ORDER BY coalesce(a.publicado_em, a.coletado_em) DESC LIMIT ?",
+            (_expressao_fts(termos), limite)
+        )
+    else:
+        condicoes = " OR ".join("lower(titulo || ' ' || resumo) LIKE ?" for _ in termos)
+        cursor = conexao.execute(
+            "SELECT titulo, link, resumo, fonte, publicado_em, coletado_em FROM artigos "
+            f"WHERE {condicoes} ORDER BY coalesce(publicado_em, coletado_em) DESC LIMIT ?",
+            [f"%{termo.lower()}%" for termo in termos] + [limite]
+        )
+    colunas = ["titulo", "link", "resumo", "fonte", "publicado_em", "coletado_em"]
+    return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
@@ -0,0 +1,276 @@
+import os
+import re
+import json
+import time
+import shutil
+import argparse
+from functools import lru_cache
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, unquote, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from configuracao import DIRETORIO_CACHE, TICKERS_VALIDOS, HORIZONTE_PAINEL
+from metricas import cronometrar, incrementar
+from arquivos import nome_arquivo, gravar_json, gravar_texto
+from tarefas import TarefaPeriodica
+
+DIRETORIO_INSTANTANEOS = os.path.join(DIRETORIO_CACHE, "instantaneos")
+# Arquivo com o nome da versão publicada; trocado atomicamente só depois que a versão está completa
+ARQUIVO_ATUAL = os.path.join(DIRETORIO_INSTANTANEOS, "ATUAL")
+
+# Intervalo (s) entre duas gerações no modo agendado
+INTERVALO_INSTANTANEO = int(os.environ.get("COMODOS_INTERVALO_INSTANTANEO", 60 * 60))
+# Quantas versões antigas ficam em disco (consumidores podem fixar uma versão via ?versao=)
+MAX_INSTANTANEOS = int(os.environ.get("COMODOS_MAX_INSTANTANEOS", 5))
+# Endereço da API somente leitura
+HOST_API = os.environ.get("COMODOS_API_HOST", "127.0.0.1")
+PORTA_API = int(os.environ.get("COMODOS_API_PORTA", 8502))
+
+# Resumo de cada ticker no índice; o documento completo fica no arquivo do ticker
+CAMPOS_INDICE = ("preco_atual", "data_atual", "previsao_amanha", "rmse", "acuracia")
+_NOME_VERSAO = re.compile(r"^\d{8}T\d{12}Z$")
+
+
+def _arquivo(ticker):
+    return nome_arquivo(ticker.upper()) + ".json"
+
+
+def _gravar_json(caminho, dados):
+    # Escalares numpy (float32 etc.) viram números comuns
+    gravar_json(caminho, dados, ensure_ascii=False, default=lambda o: o.item())
+
+
+def _nova_versao():
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def listar_versoes():
+    """Versões completas em disco, da mais antiga para a mais recente."""
+    try:
+        nomes = os.listdir(DIRETORIO_INSTANTANEOS)
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in nomes
+                  if _NOME_VERSAO.match(n) and os.path.exists(os.path.join(DIRETORIO_INSTANTANEOS, n, "indice.json")))
+
+
+def versao_atual():
+    try:
+        with open(ARQUIVO_ATUAL, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=256)
+def _ler_json(caminho):
+    # Versões são imutáveis depois de publicadas: o caminho basta como chave do cache
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _ler(versao, arquivo):
+    versao = versao or versao_atual()
+    # A versão pode vir de uma query string: só nomes gerados aqui chegam ao sistema de arquivos
+    if not versao or not _NOME_VERSAO.match(versao):
+        return None
+    try:
+        return _ler_json(os.path.join(DIRETORIO_INSTANTANEOS, versao, arquivo))
+    except (OSError, ValueError):
+        return None
+
+
+def ler_indice(versao=None):
+    """Índice da versão (padrão: a publicada) ou None se não houver instantâneo."""
+    return _ler(versao, "indice.json")
+
+
+def ler_ticker(ticker, versao=None):
+    """Documento do ticker {ticker, nome, versao, gerado_em, previsao, erro, noticias} ou None."""
+    return _ler(versao, _arquivo(ticker))
+
+
+def _noticias(tickers, exibir_log):
+    # Importado só aqui: quem apenas lê instantâneos não carrega o coletor
+    from noticias import ingerir_noticias, buscar_noticias_lote
+
+    try:
+        ingerir_noticias()
+    except Exception as e:
+        print(f"Aviso: Falha na ingestão de notícias, usando o índice atual: {e}")
+
+    # Uma consulta ao índice para todos os tickers, em vez de uma busca por ticker
+    try:
+        return buscar_noticias_lote(tickers)
+    except Exception as e:
+        if exibir_log:
+            print(f"Aviso: Notícias indisponíveis: {e}")
+        return {ticker: {"mensagem": f"Erro ao buscar notícias: {e}"} for ticker in tickers}
+
+
+def gerar_instantaneo(tickers=None, max_workers=None, threads_torch=1, usar_cache=True,
+                      horizonte=HORIZONTE_PAINEL, exibir_log=False, max_versoes=MAX_INSTANTANEOS):
+    """Calcula previsões, métricas e notícias de todos os tickers e publica uma nova versão.
+
+    A versão é montada num diretório temporário e renomeada de uma vez; só então ATUAL passa a apontar
+    para ela, então leitores nunca veem um instantâneo pela metade. Retorna o nome da versão.
+    """
+    from lote import prever_em_paralelo
+
+    tickers = list(tickers or TICKERS_VALIDOS)
+    versao = _nova_versao()
+    gerado_em = time.time()
+
+    with cronometrar("instantaneo", etapa="previsao"):
+        linhas = prever_em_paralelo(tickers, max_workers, threads_torch, exibir_log, usar_cache, horizonte)
+    with cronometrar("instantaneo", etapa="noticias"):
+        noticias = _noticias(tickers, exibir_log)
+
+    os.makedirs(DIRETORIO_INSTANTANEOS, exist_ok=True)
+    temporario = os.path.join(DIRETORIO_INSTANTANEOS, f".{versao}.tmp")
+    os.makedirs(temporario)
+    try:
+        resumo = {}
+        for linha in sorted(linhas, key=lambda l: l["ticker"]):
+            ticker, erro = linha.pop("ticker"), linha.pop("erro")
+            nome, segundos = linha.pop("nome"), linha.pop("segundos")
+            _gravar_json(os.path.join(temporario, _arquivo(ticker)), {
+                "ticker": ticker,
+                "nome": nome,
+                "versao": versao,
+                "gerado_em": gerado_em,
+                "segundos": segundos,
+                "previsao": None if erro else linha,
+                "erro": erro,
+                "noticias": noticias.get(ticker),
+            })
+            resumo[ticker] = dict({c: linha.get(c) for c in CAMPOS_INDICE}, nome=nome, erro=erro)
+            incrementar("instantaneo_tickers", status="ok" if erro is None else "erro")
+
+        _gravar_json(os.path.join(temporario, "indice.json"), {
+            "versao": versao,
+            "gerado_em": gerado_em,
+            "horizonte": horizonte,
+            "tickers": resumo,
+        })
+        os.rename(temporario, os.path.join(DIRETORIO_INSTANTANEOS, versao))
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+
+    gravar_texto(ARQUIVO_ATUAL, versao)
+
+    if max_versoes is not None:
+        _podar(max_versoes)
+    return versao
+
+
+def _podar(max_versoes):
+    atual = versao_atual()
+    for versao in listar_versoes()[:-max_versoes or None]:
+        if versao != atual:
+            shutil.rmtree(os.path.join(DIRETORIO_INSTANTANEOS, versao), ignore_errors=True)
+
+
+class GeradorInstantaneos(TarefaPeriodica):
+    """Gera um instantâneo a cada intervalo; a espera parte do último publicado, mesmo que por outro processo."""
+
+    descricao = "ao gerar instantâneo"
+
+    def __init__(self, intervalo=INTERVALO_INSTANTANEO, exibir_log=False, **opcoes):
+        super().__init__("gerador-instantaneos", intervalo, exibir_log)
+        self.opcoes = opcoes
+
+    def ultima_execucao(self):
+        indice = ler_indice()
+        return indice["gerado_em"] if indice else None
+
+    def executar(self):
+        versao = gerar_instantaneo(exibir_log=self.exibir_log, **self.opcoes)
+        if self.exibir_log:
+            print(f"Instantâneo {versao} publicado")
+
+
+class _ManipuladorAPI(BaseHTTPRequestHandler):
+    """GET /versoes, GET /indice e GET /previsoes/<ticker>; ?versao=... fixa uma versão antiga."""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        partes = [unquote(p) for p in url.path.strip("/").split("/") if p]
+        versao = parse_qs(url.query).get("versao", [None])[0] or versao_atual()
+
+        if partes in ([], ["versoes"]):
+            self._responder(200, {"atual": versao_atual(), "versoes": listar_versoes()}, armazenavel=False)
+        elif partes == ["indice"]:
+            self._responder_documento(ler_indice(versao), versao)
+        elif len(partes) == 2 and partes[0] == "previsoes":
+            self._responder_documento(ler_ticker(partes[1], versao), versao)
+        else:
+            self._responder(404, {"erro": "Rota desconhecida"}, armazenavel=False)
+
+    def _responder_documento(self, documento, versao):
+        if documento is None:
+            self._responder(404, {"erro": "Instantâneo não encontrado"}, armazenavel=False)
+            return
+        # Documentos de uma versão nunca mudam: a versão serve de ETag
+        etag = f'"{versao}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._responder(200, documento, etag=etag)
+
+    def _responder(self, status, dados, etag=None, armazenavel=True):
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.send_header("Cache-Control", "public, max-age=60" if armazenavel else "no-cache")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(corpo)
+        incrementar("api_respostas", status=str(status))
+
+    def log_message(self, *args):
+        pass
+
+
+def servir_api(porta=PORTA_API, host=HOST_API):
+    """Bloqueia servindo os instantâneos em JSON; só leitura, nada é calculado aqui."""
+    servidor = ThreadingHTTPServer((host, porta), _ManipuladorAPI)
+    print(f"API de instantâneos em http://{host}:{porta}/")
+    try:
+        servidor.serve_forever()
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Instantâneos pré-calculados de previsões e notícias.")
+    parser.add_argument("comando", choices=["gerar", "agendar", "servir"],
+                        help="gerar: uma versão agora; agendar: uma versão a cada intervalo; "
+                             "servir: API somente leitura (com --intervalo, também agenda)")
+    parser.add_argument("tickers", nargs="*", help="Tickers a processar (padrão: todos os válidos)")
+    parser.add_argument("--workers", type=int, default=None, help="Número de processos")
+    parser.add_argument("--threads", type=int, default=1, help="Threads do torch por processo")
+    parser.add_argument("--sem-cache", action="store_true", help="Ignora modelos salvos e treina novamente")
+    parser.add_argument("--intervalo", type=int, default=None, help="Segundos entre gerações")
+    parser.add_argument("--porta", type=int, default=PORTA_API, help="Porta da API")
+    parser.add_argument("--host", default=HOST_API, help="Endereço da API")
+    args = parser.parse_args()
+
+    opcoes = {
+        "tickers": [t.upper() for t in args.tickers] or None,
+        "max_workers": args.workers,
+        "threads_torch": args.threads,
+        "usar_cache": not args.sem_cache,
+    }
+    if args.comando == "gerar":
+        print(f"Instantâneo {gerar_instantaneo(exibir_log=True, **opcoes)} publicado")
+    elif args.comando == "agendar":
+        GeradorInstantaneos(args.intervalo or INTERVALO_INSTANTANEO, exibir_log=True, **opcoes).run()
+    else:
+        if args.intervalo:
+            GeradorInstantaneos(args.intervalo, exibir_log=True, **opcoes).start()
+        servir_api(args.porta, args.host)
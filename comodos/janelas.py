@@ -0,0 +1,30 @@
+import warnings
+import numpy as np
+import torch
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def criar_janelas(dados, seq_length, horizonte=1):
+    """Janelas deslizantes sem cópia: X[i] = dados[i:i+seq_length] e y[i] = dados[i+seq_length:i+seq_length+horizonte, 0].
+
+    X tem formato (N, seq_length, n_features) e y (N, horizonte), ambos float32 e ambos
+    views sobre uma única cópia contígua de dados; a memória cresce com o histórico, não
+    com seq_length x histórico.
+    """
+    dados = np.ascontiguousarray(dados, dtype=np.float32)
+    n = len(dados) - seq_length - horizonte + 1
+    if n <= 0:
+        return np.empty((0, seq_length, dados.shape[1]), dtype=np.float32), np.empty((0, horizonte), dtype=np.float32)
+
+    # sliding_window_view coloca a janela no último eixo: (N, n_features, seq_length)
+    X = sliding_window_view(dados, seq_length, axis=0)[:n].transpose(0, 2, 1)
+    y = sliding_window_view(dados[seq_length:, 0], horizonte)
+    return X, y
+
+
+def para_tensor(array):
+    """Tensor que compartilha a memória do array, inclusive views com strides."""
+    with warnings.catch_warnings():
+        # As views de sliding_window_view são somente leitura; os tensores nunca são alterados
+        warnings.filterwarnings("ignore", message="The given NumPy array is not writable")
+        return torch.from_numpy(array)
@@ -0,0 +1,131 @@
+import os
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import torch
+from configuracao import TICKERS_VALIDOS, HORIZONTE_PAINEL
+from armazenamento import atualizar_historicos
+from previsao import executar_previsao, configurar_threads
+
+
+def inicializar_processo(threads_torch):
+    """Initializer dos workers de previsão (lote e backtest): limita os threads do torch em cada processo."""
+    # Sem limite, cada processo abriria um thread por núcleo e os workers disputariam a CPU
+    configurar_threads(threads_torch)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+
+def _prever(ticker, usar_cache=True, horizonte=HORIZONTE_PAINEL):
+    inicio = time.perf_counter()
+    linha = {"ticker": ticker, "nome": TICKERS_VALIDOS.get(ticker, ticker)}
+    try:
+        linha.update(executar_previsao(ticker, exibir_log=False, usar_cache=usar_cache, horizonte=horizonte))
+        linha["erro"] = None
+    except Exception as e:
+        linha["erro"] = str(e)
+    linha["segundos"] = time.perf_counter() - inicio
+    return linha
+
+
+def executar_lote(tickers=None, max_workers=None, threads_torch=1, exibir_log=False, usar_cache=True,
+                  horizonte=HORIZONTE_PAINEL):
+    """Treina e avalia vários tickers em paralelo e devolve uma tabela com os resultados."""
+    return _tabela(prever_em_paralelo(tickers, max_workers, threads_torch, exibir_log, usar_cache, horizonte))
+
+
+def prever_em_paralelo(tickers=None, max_workers=None, threads_torch=1, exibir_log=False, usar_cache=True,
+                       horizonte=HORIZONTE_PAINEL):
+    """Uma linha por ticker com o resultado completo de executar_previsao, mais nome, segundos e erro.
+
+    O horizonte padrão é o do painel, para que o lote deixe prontos os mesmos modelos que o app consulta.
+    """
+    tickers = list(tickers or TICKERS_VALIDOS)
+    if max_workers is None:
+        max_workers = max(1, min(len(tickers), (os.cpu_count() or 1) // max(1, threads_torch)))
+
+    # Um único download em lote abastece o cache; os workers leem apenas do disco
+    try:
+        atualizar_historicos(tickers)
+    except Exception as e:
+        print(f"Aviso: Falha no download em lote, cada ticker tentará individualmente: {e}")
+
+    linhas = []
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=contexto,
+                             initializer=inicializar_processo, initargs=(threads_torch,)) as executor:
+        futuros = {executor.submit(_prever, t, usar_cache, horizonte): t for t in tickers}
+        for futuro in as_completed(futuros):
+            linha = futuro.result()
+            if exibir_log:
+                status = "ok" if linha["erro"] is None else f"erro: {linha['erro']}"
+                print(f"{linha['ticker']}: {status} ({linha['segundos']:.1f}s)")
+            linhas.append(linha)
+
+    return linhas
+
+
+def _tabela(linhas):
+    colunas = ["ticker", "nome", "preco_atual", "previsao_amanha", "rmse", "acuracia", "segundos", "erro"]
+    resultados = pd.DataFrame(linhas)
+    return resultados.reindex(columns=colunas).sort_values("ticker").reset_index(drop=True)
+
+
+def executar_lote_global(tickers=None, exibir_log=False, usar_cache=True):
+    """Mesma tabela de executar_lote, com um único modelo global treinado com todos os tickers.
+
+    "segundos" é o tempo total (treino e inferência são compartilhados); tickers sem dados saem com erro.
+    """
+    from modelo_global import prever_global
+
+    tickers = list(tickers or TICKERS_VALIDOS)
+    inicio = time.perf_counter()
+    resultados = prever_global(tickers, exibir_log=exibir_log, usar_cache=usar_cache)
+    segundos = time.perf_counter() - inicio
+
+    linhas = []
+    for ticker in tickers:
+        linha = {"ticker": ticker, "nome": TICKERS_VALIDOS.get(ticker, ticker), "segundos": segundos}
+        if ticker in resultados:
+            linha.update(resultados[ticker], erro=None)
+        else:
+            linha["erro"] = "dados insuficientes"
+        linhas.append(linha)
+    return _tabela(linhas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Previsão em lote para vários tickers.")
+    parser.add_argument("tickers", nargs="*", help="Tickers a processar (padrão: todos os válidos)")
+    parser.add_argument("--workers", type=int, default=None, help="Número de processos")
+    parser.add_argument("--threads", type=int, default=1, help="Threads do torch por processo")
+    parser.add_argument("--sem-cache", action="store_true", help="Ignora modelos salvos e treina novamente")
+    parser.add_argument("--horizonte", type=int, default=HORIZONTE_PAINEL,
+                        help="Dias à frente previstos (padrão: o mesmo do painel)")
+    parser.add_argument("--saida", help="Grava a tabela de resultados em CSV")
+    parser.add_argument("--global", dest="modelo_global", action="store_true",
+                        help="Um único modelo para todos os tickers, com embedding por ticker")
+    args = parser.parse_args()
+
+    if args.modelo_global:
+        tabela = executar_lote_global(
+            [t.upper() for t in args.tickers] or None,
+            exibir_log=True,
+            usar_cache=not args.sem_cache
+        )
+    else:
+        tabela = executar_lote(
+            [t.upper() for t in args.tickers] or None,
+            max_workers=args.workers,
+            threads_torch=args.threads,
+            exibir_log=True,
+            usar_cache=not args.sem_cache,
+            horizonte=args.horizonte
+        )
+    if args.saida:
+        tabela.to_csv(args.saida, index=False)
+    print(tabela.to_string(index=False))
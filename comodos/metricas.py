@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from arquivos import gravar_texto
+
+PREFIXO = "comodos"
+# Limites (em segundos) dos buckets dos histogramas de duração
+BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+# "1" grava uma linha JSON em stderr para cada etapa cronometrada
+LOG_ESTRUTURADO = os.environ.get("COMODOS_LOG_METRICAS") == "1"
+# Se definido, as métricas são gravadas nesse arquivo (formato Prometheus) ao fim do processo
+ARQUIVO_METRICAS = os.environ.get("COMODOS_METRICAS_ARQUIVO")
+# Se definido, o processo expõe /metrics nessa porta
+PORTA_METRICAS = os.environ.get("COMODOS_METRICAS_PORTA")
+
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+class Metricas:
+    """Contadores e histogramas de duração em memória, seguros entre threads."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.contadores = {}
+        self.duracoes = {}
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = _chave(nome, rotulos)
+        with self._trava:
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+    def observar(self, nome, segundos, **rotulos):
+        chave = _chave(nome, rotulos)
+        with self._trava:
+            registro = self.duracoes.get(chave)
+            if registro is None:
+                registro = self.duracoes[chave] = {"contagem": 0, "soma": 0.0, "maximo": 0.0, "buckets": [0] * len(BUCKETS)}
+            registro["contagem"] += 1
+            registro["soma"] += segundos
+            registro["maximo"] = max(registro["maximo"], segundos)
+            for i, limite in enumerate(BUCKETS):
+                if segundos <= limite:
+                    registro["buckets"][i] += 1
+
+    def zerar(self):
+        with self._trava:
+            self.contadores.clear()
+            self.duracoes.clear()
+
+    def resumo(self):
+        """Uma linha por etapa cronometrada: contagem, total, média e máximo (para tabelas)."""
+        with self._trava:
+            linhas = [
+                dict(etapa=nome, **dict(rotulos), contagem=r["contagem"], total_s=r["soma"],
+                     media_s=r["soma"] / r["contagem"], maximo_s=r["maximo"])
+                for (nome, rotulos), r in self.duracoes.items()
+            ]
+        return sorted(linhas, key=lambda linha: linha["total_s"], reverse=True)
+
+    def resumo_contadores(self):
+        with self._trava:
+            return [dict(contador=nome, **dict(rotulos), valor=valor) for (nome, rotulos), valor in sorted(self.contadores.items())]
+
+    def texto_prometheus(self):
+        """Formato de exposição em texto do Prometheus (versão 0.0.4)."""
+        with self._trava:
+            contadores = sorted(self.contadores.items())
+            duracoes = sorted((chave, dict(r, buckets=list(r["buckets"]))) for chave, r in self.duracoes.items())
+
+        linhas = []
+        vistos = set()
+        for (nome, rotulos), valor in contadores:
+            metrica = f"{PREFIXO}_{nome}_total"
+            if metrica not in vistos:
+                vistos.add(metrica)
+                linhas.append(f"# TYPE {metrica} counter")
+            linhas.append(f"{metrica}{_rotulos(rotulos)} {valor}")
+        for (nome, rotulos), r in duracoes:
+            metrica = f"{PREFIXO}_{nome}_segundos"
+            if metrica not in vistos:
+                vistos.add(metrica)
+                linhas.append(f"# TYPE {metrica} histogram")
+            for limite, quantidade in zip(BUCKETS, r["buckets"]):
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                linhas.append(f"{metrica}_bucket{_rotulos(rotulos + (('le', le),))} {quantidade}")
+            linhas.append(f"{metrica}_sum{_rotulos(rotulos)} {r['soma']}")
+            linhas.append(f"{metrica}_count{_rotulos(rotulos)} {r['contagem']}")
+        return "\n".join(linhas) + "\n"
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    escapar = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in rotulos) + "}"
+
+
+metricas = Metricas()
+
+
+def incrementar(nome, valor=1, **rotulos):
+    metricas.incrementar(nome, valor, **rotulos)
+
+
+@contextmanager
+def cronometrar(nome, **rotulos):
+    """Mede a duração do bloco; exceções são contadas em <nome>_erros e propagadas."""
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        yield
+    except BaseException as e:
+        erro = type(e).__name__
+        metricas.incrementar(f"{nome}_erros", **rotulos)
+        raise
+    finally:
+        segundos = time.perf_counter() - inicio
+        metricas.observar(nome, segundos, **rotulos)
+        if LOG_ESTRUTURADO:
+            registro = {"ts": time.time(), "etapa": nome, "segundos": round(segundos, 6), **rotulos}
+            if erro:
+                registro["erro"] = erro
+            print(json.dumps(registro, ensure_ascii=False, default=str), file=sys.stderr)
+
+
+def instrumentar(nome):
+    """Decorador que cronometra cada chamada da função com cronometrar(nome)."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with cronometrar(nome):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def gravar_prometheus(caminho=ARQUIVO_METRICAS):
+    """Grava as métricas em um arquivo para o textfile collector do node_exporter."""
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    gravar_texto(caminho, metricas.texto_prometheus())
+
+
+class _ManipuladorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        corpo = metricas.texto_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+_servidor = None
+_trava_servidor = threading.Lock()
+
+
+def servir_prometheus(porta=None, host="127.0.0.1"):
+    """Sobe (uma única vez por processo) um endpoint /metrics em thread de fundo."""
+    global _servidor
+    with _trava_servidor:
+        if _servidor is None:
+            porta = int(porta if porta is not None else PORTA_METRICAS or 9108)
+            _servidor = ThreadingHTTPServer((host, porta), _ManipuladorMetricas)
+            threading.Thread(target=_servidor.serve_forever, name="metricas", daemon=True).start()
+        return _servidor
+
+
+if ARQUIVO_METRICAS:
+    import atexit
+    atexit.register(gravar_prometheus, ARQUIVO_METRICAS)
@@ -0,0 +1,316 @@
+import copy
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from configuracao import TICKERS_VALIDOS
+from armazenamento import atualizar_historicos
+from janelas import para_tensor
+from metricas import cronometrar, incrementar, instrumentar
+from normalizacao import mean_squared_error
+from registro_modelos import (
+    familia_modelo, chave_modelo, carregar_modelo, carregar_ultimo_modelo, salvar_modelo, IDADE_MAXIMA_PADRAO
+)
+from previsao import (
+    COLUNAS, SEQ_LENGTH, CONFIG_MODELO, HORIZONTE_PADRAO, AMOSTRAS_MC, QUANTIS, TAMANHO_LOTE,
+    EPOCAS_AJUSTE, MAX_AJUSTES, TOLERANCIA_RMSE, configurar_threads, obter_dados, preprocessar_dados,
+    dividir_dados, escala_desviou, direction_accuracy, desnormalizar_close
+)
+
+# Dimensão do embedding que identifica a commodity de cada janela
+DIM_EMBEDDING = 8
+
+
+class LSTMGlobal(nn.Module):
+    """LSTMModel compartilhado entre tickers: o embedding do ticker é concatenado a cada passo da janela."""
+
+    def __init__(self, input_size, n_tickers, dim_embedding=DIM_EMBEDDING, hidden_size=128, num_layers=2,
+                 output_size=1, dropout=0.2):
+        super().__init__()
+        self.embedding = nn.Embedding(n_tickers, dim_embedding)
+        self.lstm = nn.LSTM(input_size + dim_embedding, hidden_size, num_layers, batch_first=True, dropout=dropout)
+        self.fc = nn.Linear(hidden_size, output_size)
+
+    def forward(self, x, tickers):
+        emb = self.embedding(tickers).unsqueeze(1).expand(-1, x.shape[1], -1)
+        lstm_out, _ = self.lstm(torch.cat([x, emb], dim=2))
+        return self.fc(lstm_out[:, -1, :])
+
+
+def ordem_embedding(tickers, anterior=None):
+    """Linha do embedding de cada ticker: a ordem anterior (ou a de TICKERS_VALIDOS) mais os novos no fim.
+
+    A tabela tem uma linha por ticker conhecido, tenha ele dados ou não, então a falta de um ticker
+    não muda o modelo; um ticker novo só acrescenta linhas.
+    """
+    ordem = list(anterior or TICKERS_VALIDOS)
+    return ordem + [t for t in tickers if t not in ordem]
+
+
+def crescer_embedding(model, n_tickers):
+    """Acrescenta linhas ao embedding; as novas partem da média das já aprendidas."""
+    antigo = model.embedding
+    if n_tickers <= antigo.num_embeddings:
+        return model
+    novo = nn.Embedding(n_tickers, antigo.embedding_dim)
+    with torch.no_grad():
+        novo.weight[:antigo.num_embeddings] = antigo.weight
+        novo.weight[antigo.num_embeddings:] = antigo.weight.mean(dim=0)
+    model.embedding = novo
+    return model
+
+
+def _carregar_global(state_dict, horizonte):
+    n_tickers = state_dict["embedding.weight"].shape[0]
+    model = LSTMGlobal(input_size=len(COLUNAS), n_tickers=n_tickers, **dict(CONFIG_MODELO, output_size=horizonte))
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model
+
+
+def _empilhar(partes, indices):
+    """Concatena (X, y) de vários tickers e devolve também a linha do embedding de cada janela."""
+    X = np.concatenate([p[0] for p in partes])
+    y = np.concatenate([p[1] for p in partes])
+    linhas = np.concatenate([np.full(len(p[0]), i, dtype=np.int64) for i, p in zip(indices, partes)])
+    return para_tensor(X), para_tensor(y), torch.from_numpy(linhas)
+
+
+def _mse(model, X, y, tickers):
+    model.eval()
+    with torch.no_grad():
+        return torch.mean((model(X, tickers) - y) ** 2).item()
+
+
+def _carregar_dados(tickers, exibir_log):
+    dados = {}
+    for ticker in tickers:
+        try:
+            dados[ticker] = obter_dados(ticker)
+        except Exception as e:
+            if exibir_log:
+                print(f"Aviso: {ticker} fora do modelo global: {e}")
+    return dados
+
+
+def _janelas(dados, scalers, ordem, horizonte):
+    """Janelas de treino e de validação de todos os tickers; quem não tem scaler ganha um ajustado aos seus dados."""
+    scalers, treino, validacao = dict(scalers), [], []
+    for ticker, data in dados.items():
+        X, y, scalers[ticker] = preprocessar_dados(data.values, scaler=scalers.get(ticker), horizonte=horizonte)
+        X_train, X_val, _, y_train, y_val, _ = dividir_dados(X, y)
+        treino.append((X_train, y_train))
+        validacao.append((X_val, y_val))
+    indices = [ordem.index(ticker) for ticker in dados]
+    return scalers, _empilhar(treino, indices), _empilhar(validacao, indices)
+
+
+@instrumentar("treino_global")
+def treinar_global(dados, horizonte=HORIZONTE_PADRAO, exibir_log=True, epochs=25, patience=7, tamanho_lote=TAMANHO_LOTE,
+                   ordem=None):
+    """Treina um único modelo com as janelas de todos os tickers em lotes misturados.
+
+    Cada ticker tem o seu scaler, então preços de ordens de grandeza diferentes caem na mesma faixa.
+    ordem é a linha do embedding de cada ticker (padrão: ordem_embedding(dados)).
+    Retorna (model, scalers, best_val_loss).
+    """
+    configurar_threads()
+    ordem = ordem or ordem_embedding(dados)
+    scalers, (X_train, y_train, t_train), validacao = _janelas(dados, {}, ordem, horizonte)
+
+    model = LSTMGlobal(input_size=X_train.shape[2], n_tickers=len(ordem),
+                       **dict(CONFIG_MODELO, output_size=horizonte))
+    optimizer = optim.Adam(model.parameters(), lr=0.0003)
+    scheduler = optim.lr_scheduler.StepLR(optimizer, step_size=10, gamma=0.8)
+    model, best_val_loss = _treinar(model, optimizer, (X_train, y_train, t_train), validacao, epochs, patience,
+                                    tamanho_lote, exibir_log, scheduler)
+    return model, scalers, best_val_loss
+
+
+@instrumentar("ajuste_global")
+def ajustar_global(model, scalers, dados, ordem, horizonte=HORIZONTE_PADRAO, exibir_log=True, epochs=EPOCAS_AJUSTE,
+                   tamanho_lote=TAMANHO_LOTE):
+    """Fine-tuning curto de um modelo global já treinado, com as janelas de todos os tickers de dados.
+
+    O embedding cresce até len(ordem) e os tickers sem scaler ganham um; os demais mantêm o scaler
+    em que os pesos foram aprendidos. Mantém os pesos (inclusive os originais) com menor erro de validação.
+    Retorna (model, scalers, best_val_loss).
+    """
+    configurar_threads()
+    crescer_embedding(model, len(ordem))
+    scalers, treino, validacao = _janelas(dados, scalers, ordem, horizonte)
+    optimizer = optim.Adam(model.parameters(), lr=0.0001)
+    model, best_val_loss = _treinar(model, optimizer, treino, validacao, epochs, epochs, tamanho_lote, exibir_log,
+                                    inicial=_mse(model, *validacao))
+    return model, scalers, best_val_loss
+
+
+def _treinar(model, optimizer, treino, validacao, epochs, patience, tamanho_lote, exibir_log, scheduler=None,
+             inicial=float('inf')):
+    X_train, y_train, t_train = treino
+    X_val, y_val, t_val = validacao
+    best_val_loss = inicial
+    trigger = 0
+    best_model = copy.deepcopy(model.state_dict())
+    for epoch in range(epochs):
+        model.train()
+        perda_total = torch.zeros(())
+        for indices in torch.randperm(len(X_train)).split(tamanho_lote):
+            optimizer.zero_grad(set_to_none=True)
+            loss = torch.mean((model(X_train[indices], t_train[indices]) - y_train[indices]) ** 2)
+            loss.backward()
+            optimizer.step()
+            perda_total += loss.detach() * len(indices)
+        if scheduler is not None:
+            scheduler.step()
+        incrementar("epocas_treino", modelo="global")
+
+        val_loss = _mse(model, X_val, y_val, t_val)
+        if val_loss < best_val_loss:
+            best_val_loss = val_loss
+            trigger = 0
+            best_model = copy.deepcopy(model.state_dict())
+        else:
+            trigger += 1
+            if trigger >= patience:
+                break
+
+        if exibir_log and epoch % 5 == 0:
+            print(f"Epoch {epoch}, Train Loss: {perda_total.item() / len(X_train):.4f}, Val Loss: {val_loss:.4f}")
+
+    model.load_state_dict(best_model)
+    model.eval()
+    return model, best_val_loss
+
+
+def _ajustar_anterior(anterior, dados, data_corte, horizonte, exibir_log):
+    """Atualiza o último modelo global (tickers ou dados novos); retorna None quando é preciso treinar do zero."""
+    state_dict, scalers, metadados = anterior
+    treinados = metadados.get("tickers", [])
+    novos = [t for t in dados if t not in treinados]
+    if metadados.get("ajustes", 0) >= MAX_AJUSTES:
+        motivo = f"{MAX_AJUSTES} ajustes seguidos"
+    elif not novos and metadados.get("data_corte", "") >= data_corte:
+        motivo = "nenhum ticker ou dado novo desde o checkpoint anterior"
+    elif any(escala_desviou(scalers[t], data.values) for t, data in dados.items() if t in scalers):
+        motivo = "valores fora da escala do modelo anterior"
+    else:
+        motivo = None
+
+    if motivo is None:
+        if exibir_log and novos:
+            print(f"Ajustando o modelo global para tickers novos: {', '.join(novos)}")
+        ordem = ordem_embedding(dados, metadados["ordem"])
+        model = _carregar_global(state_dict, horizonte)
+        model, scalers, val_loss = ajustar_global(model, scalers, dados, ordem, horizonte, exibir_log)
+        val_rmse = float(np.sqrt(val_loss))
+
+        # Com tickers novos a validação muda de composição e o RMSE anterior deixa de ser referência;
+        # ajustar_global já descarta épocas piores que os pesos de partida nessa validação
+        if novos or val_rmse <= metadados["val_rmse"] * (1 + TOLERANCIA_RMSE):
+            return model, scalers, ordem, {
+                "val_rmse": val_rmse,
+                # Tickers ausentes desta vez continuam no modelo (linha do embedding e scaler)
+                "tickers": treinados + novos,
+                "ajustes": metadados.get("ajustes", 0) + 1,
+            }
+        motivo = f"RMSE de validação piorou ({metadados['val_rmse']:.4f} -> {val_rmse:.4f})"
+
+    if exibir_log:
+        print(f"Treinando o modelo global do zero: {motivo}")
+    return None
+
+
+def prever_global(tickers=None, exibir_log=True, usar_cache=True, idade_maxima=IDADE_MAXIMA_PADRAO,
+                  horizonte=HORIZONTE_PADRAO, amostras=AMOSTRAS_MC, quantis=QUANTIS, incremental=True):
+    """Previsões de todos os tickers com um único modelo e um único forward por etapa.
+
+    Com incremental=True, tickers ou dados novos ajustam o último modelo da família em vez de treinar outro.
+    Retorna {ticker: resultado} com as mesmas chaves numéricas de executar_previsao
+    (preco_atual, data_atual, previsao_amanha, rmse, acuracia, horizonte).
+    """
+    tickers = sorted(tickers or TICKERS_VALIDOS)
+    try:
+        atualizar_historicos(tickers)
+    except Exception as e:
+        print(f"Aviso: Falha no download em lote, cada ticker tentará individualmente: {e}")
+    dados = _carregar_dados(tickers, exibir_log)
+    if not dados:
+        raise RuntimeError("Nenhum ticker com dados suficientes para o modelo global.")
+
+    data_corte = max(data.index[-1] for data in dados.values()).strftime("%Y-%m-%d")
+    # Sem a lista de tickers: quais têm dados hoje não muda a família (o embedding tem linhas fixas)
+    config = dict(CONFIG_MODELO, output_size=horizonte, dim_embedding=DIM_EMBEDDING)
+    familia = familia_modelo("GLOBAL", COLUNAS, SEQ_LENGTH, config)
+    chave = chave_modelo(familia, data_corte)
+    registro = carregar_modelo(chave, idade_maxima) if usar_cache else None
+
+    if registro is not None and all(t in registro[2].get("tickers", []) for t in dados):
+        incrementar("modelos", origem="cache", modelo="global")
+        state_dict, scalers, metadados = registro
+        ordem = metadados["ordem"]
+        model = _carregar_global(state_dict, horizonte)
+    else:
+        anterior = registro or (carregar_ultimo_modelo(familia) if usar_cache and incremental else None)
+        ajustado = _ajustar_anterior(anterior, dados, data_corte, horizonte, exibir_log) if anterior is not None else None
+
+        if ajustado is not None:
+            incrementar("modelos", origem="ajuste", modelo="global")
+            model, scalers, ordem, metadados = ajustado
+        else:
+            incrementar("modelos", origem="treino", modelo="global")
+            ordem = ordem_embedding(dados)
+            model, scalers, best_val_loss = treinar_global(dados, horizonte, exibir_log, ordem=ordem)
+            metadados = {"val_rmse": float(np.sqrt(best_val_loss)), "tickers": list(dados), "ajustes": 0}
+
+        salvar_modelo(chave, model.state_dict(), scalers, dict(
+            metadados, ordem=ordem, familia=familia, data_corte=data_corte
+        ))
+
+    with cronometrar("inferencia", modelo="global"):
+        teste, ultimas = [], []
+        for ticker, data in dados.items():
+            X, y, _ = preprocessar_dados(data.values, scaler=scalers[ticker], horizonte=horizonte)
+            _, _, X_test, _, _, y_test = dividir_dados(X, y)
+            teste.append((X_test, y_test[:, :1]))
+            ultimas.append(scalers[ticker].transform(data.values[-SEQ_LENGTH:]).astype(np.float32))
+
+        linhas = [ordem.index(ticker) for ticker in dados]
+        X_test, y_test, t_test = _empilhar(teste, linhas)
+        janelas = torch.from_numpy(np.stack(ultimas))
+        indices = torch.tensor(linhas)
+        with torch.no_grad():
+            previsto_teste = model(X_test, t_test)[:, :1].numpy()
+            previsto = model(janelas, indices).numpy()
+
+        # MC dropout de todos os tickers no mesmo forward: amostras cópias de cada janela
+        model.train()
+        try:
+            with torch.no_grad():
+                saidas = model(janelas.repeat_interleave(amostras, dim=0), indices.repeat_interleave(amostras))
+        finally:
+            model.eval()
+        bandas = np.quantile(saidas.numpy().reshape(len(dados), amostras, horizonte), quantis, axis=1)
+
+    resultados = {}
+    for i, (ticker, data) in enumerate(dados.items()):
+        scaler = scalers[ticker]
+        do_ticker = t_test.numpy() == linhas[i]
+        real, prev = y_test.numpy()[do_ticker], previsto_teste[do_ticker]
+        faixa = desnormalizar_close(bandas[:, i], scaler)
+        previsao = desnormalizar_close(previsto[i], scaler)
+        resultados[ticker] = {
+            "preco_atual": float(data['Close'].iloc[-1]),
+            "data_atual": data.index[-1].strftime("%Y-%m-%d"),
+            "previsao_amanha": float(previsao[0]),
+            "rmse": float(np.sqrt(mean_squared_error(real, prev))),
+            "acuracia": float(direction_accuracy(real, prev)),
+            "horizonte": {
+                "dias": list(range(1, horizonte + 1)),
+                "previsao": previsao.tolist(),
+                "inferior": faixa[0].tolist(),
+                "mediana": faixa[1].tolist(),
+                "superior": faixa[2].tolist(),
+            },
+        }
+    return resultados
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class MinMaxScaler:
+    """Escala cada coluna para feature_range, com os mesmos atributos e fórmulas do MinMaxScaler do sklearn.
+
+    Colunas constantes (faixa zero) usam escala 1, como no sklearn, em vez de dividir por zero.
+    """
+
+    def __init__(self, feature_range=(0, 1)):
+        self.feature_range = feature_range
+
+    def fit(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        minimo, maximo = self.feature_range
+        if minimo >= maximo:
+            raise ValueError(f"feature_range inválido: {self.feature_range}")
+        self.n_features_in_ = X.shape[1]
+        self.data_min_ = np.nanmin(X, axis=0)
+        self.data_max_ = np.nanmax(X, axis=0)
+        self.data_range_ = self.data_max_ - self.data_min_
+        self.scale_ = (maximo - minimo) / np.where(self.data_range_ == 0, 1.0, self.data_range_)
+        self.min_ = minimo - self.data_min_ * self.scale_
+        return self
+
+    def _validar(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if not hasattr(self, "scale_"):
+            raise ValueError("MinMaxScaler ainda não foi ajustado; chame fit antes.")
+        if X.shape[-1] != self.n_features_in_:
+            raise ValueError(f"Esperadas {self.n_features_in_} colunas, recebidas {X.shape[-1]}.")
+        return X
+
+    def transform(self, X):
+        return self._validar(X) * self.scale_ + self.min_
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+    def inverse_transform(self, X):
+        return (self._validar(X) - self.min_) / self.scale_
+
+
+def mean_squared_error(y_true, y_pred):
+    """Média dos erros quadráticos sobre todos os elementos (equivale ao sklearn com multioutput='uniform_average')."""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    if y_true.shape != y_pred.shape:
+        raise ValueError(f"Formatos diferentes: {y_true.shape} e {y_pred.shape}")
+    return float(np.mean((y_true - y_pred) ** 2))
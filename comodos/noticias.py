@@ -1,8 +1,19 @@
-import feedparser
-import requests
-from bs4 import BeautifulSoup
-import re
+import os
+import sys
 import time
+import calendar
+import threading
+from coletor import coletar, PRAZO_PADRAO
+from cache_http import obter_entradas
+from extracao import extrair
+from metricas import cronometrar, incrementar, instrumentar
+from tarefas import TarefaPeriodica
+from indice_noticias import conectar, gravar_artigos, ultima_ingestao, consultar
+from relevancia import ClassificadorNoticias, classificador_para, classificador_padrao
+from configuracao import TICKERS_VALIDOS, TERMOS_INGLES
+
+# Intervalo (em segundos) entre coletas do ingestor em segundo plano
+INTERVALO_INGESTAO = int(os.environ.get("COMODOS_INTERVALO_INGESTAO", 15 * 60))
 
 def obter_nome_commodity(ticker):
     nomes_comodities = {
@@ -24,202 +35,205 @@ def obter_nome_commodity(ticker):
     }
     return nomes_comodities.get(ticker, ticker)
 
-def buscar_noticias_rss(termo, termo_ingles):
-    feeds = [
-        # Internacionais
-        "https://www.reuters.com/arc/outboundfeeds/newsroom/commodities/?format=xml",  # Reuters Commodities
-        "https://www.investing.com/rss/news_1.rss",  # Investing.com Commodities
-        "https://feeds.a.dj.com/rss/RSSMarketsMain.xml",  # WSJ Markets
-        "https://www.marketwatch.com/rss/commodities",  # MarketWatch Commodities
-        "https://www.ft.com/markets?format=rss",  # Financial Times Markets
-        "https://www.cnbc.com/id/10000664/device/rss",  # CNBC Markets
-        "https://www.thestreet.com/feed/markets",  # TheStreet Markets
-        "https://www.bloomberg.com/feeds/markets.xml",  # Bloomberg Markets
-        "https://www.barchart.com/stocks/sectors/commodities/rss",  # Barchart Commodities
-        "https://www.agriculture.com/news/rss",  # Agriculture.com
-        # Brasileiras
-        "https://www.valor.com.br/empresas/agro/rss.xml",  # Valor Econômico Agro
-        "https://www.estadao.com.br/economia/agronegocio/rss.xml",  # Estadão Agronegócio
-        "https://www1.folha.uol.com.br/mercado/rss091.xml",  # Folha Mercado
-        "https://exame.com/brasil/agro/feed/",  # Exame Agronegócio
-        "https://globorural.globo.com/rss.xml",  # Globo Rural
-        "https://www.canalrural.com.br/rss/",  # Canal Rural
-        "https://www.noticiasagricolas.com.br/rss.xml",  # Notícias Agrícolas
-        "https://g1.globo.com/economia/agronegocios/noticia/feed/",  # G1 Agronegócio
-        "https://www.ocafezinho.com/feed/"  # O Cafezinho
-    ]
-    
-    noticias = []
-    palavras_relevantes = [
-        "price", "market", "futures", "export", "production", "supply", "demand", "commodity", "tariff",
-        "preço", "mercado", "exportação", "produção", "oferta", "demanda", "safra", "clima", "arábica",
-        "robusta", "cotação", "bolsa", "commodities"
-    ]
-    palavras_ignorar = [
-        "recipe", "cooking", "culinary", "lifestyle", "health", "diet", "consumer", "receita", "culinária",
-        "estilo de vida", "saúde", "dieta", "café da manhã", "barista", "promoção", "loja"
+FEEDS = [
+    # Internacionais
+    "https://www.reuters.com/arc/outboundfeeds/newsroom/commodities/?format=xml",  # Reuters Commodities
+    "https://www.investing.com/rss/news_1.rss",  # Investing.com Commodities
+    "https://feeds.a.dj.com/rss/RSSMarketsMain.xml",  # WSJ Markets
+    "https://www.marketwatch.com/rss/commodities",  # MarketWatch Commodities
+    "https://www.ft.com/markets?format=rss",  # Financial Times Markets
+    "https://www.cnbc.com/id/10000664/device/rss",  # CNBC Markets
+    "https://www.thestreet.com/feed/markets",  # TheStreet Markets
+    "https://www.bloomberg.com/feeds/markets.xml",  # Bloomberg Markets
+    "https://www.barchart.com/stocks/sectors/commodities/rss",  # Barchart Commodities
+    "https://www.agriculture.com/news/rss",  # Agriculture.com
+    # Brasileiras
+    "https://www.valor.com.br/empresas/agro/rss.xml",  # Valor Econômico Agro
+    "https://www.estadao.com.br/economia/agronegocio/rss.xml",  # Estadão Agronegócio
+    "https://www1.folha.uol.com.br/mercado/rss091.xml",  # Folha Mercado
+    "https://exame.com/brasil/agro/feed/",  # Exame Agronegócio
+    "https://globorural.globo.com/rss.xml",  # Globo Rural
+    "https://www.canalrural.com.br/rss/",  # Canal Rural
+    "https://www.noticiasagricolas.com.br/rss.xml",  # Notícias Agrícolas
+    "https://g1.globo.com/economia/agronegocios/noticia/feed/",  # G1 Agronegócio
+    "https://www.ocafezinho.com/feed/"  # O Cafezinho
+]
+
+URLS_SCRAPING = [
+    # Internacionais
+    "https://www.investing.com/news/commodities-news",  # Investing.com Commodities
+    "https://www.reuters.com/markets/commodities/",  # Reuters Commodities
+    "https://www.ft.com/commodities",  # Financial Times Commodities
+    "https://www.cnbc.com/commodities/",  # CNBC Commodities
+    "https://www.thestreet.com/markets",  # TheStreet Markets
+    "https://www.bloomberg.com/markets/commodities",  # Bloomberg Commodities
+    "https://www.barchart.com/news/commodities",  # Barchart News
+    "https://www.agriculture.com/markets/commodities",  #
+    # Brasileiras
+    "https://www.valor.com.br/agro/",  # Valor Econômico Agro
+    "https://www.estadao.com.br/economia/agronegocio/",  # Estadão Agronegócio
+    "https://www1.folha.uol.com.br/mercado/",  # Folha Mercado
+    "https://exame.com/economia/agro/",  # Exame Agronegócio
+    "https://revistagloborural.globo.com/mercado/",  # Globo Rural Mercado
+    "https://www.canalrural.com.br/noticias/mercado/",  # Canal Rural Mercado
+    "https://www.noticiasagricolas.com.br/noticias/cafe/",  # Notícias Agrícolas Café
+    "https://g1.globo.com/economia/agronegocios/",  # G1 Agronegócio
+    "https://www.ocafezinho.com/categoria/economia/"  # O Cafezinho Economia
+]
+
+def extrair_entradas_rss(conteudo):
+    # Parsers importados sob demanda: o app e as consultas ao índice não precisam deles
+    import feedparser
+    feed = feedparser.parse(conteudo)
+    entradas = []
+    for entry in feed.entries:
+        title = entry.get("title", "")
+        link = entry.get("link", "")
+        if title and link:
+            publicado = entry.get("published_parsed") or entry.get("updated_parsed")
+            entradas.append({
+                "titulo": title,
+                "link": link,
+                "resumo": entry.get("summary", ""),
+                "publicado_em": calendar.timegm(publicado) if publicado else None
+            })
+    return entradas
+
+def extrair_entradas_html(url, html):
+    # Seletores por host em seletores.json; o parser mais rápido instalado monta só as tags das manchetes
+    return extrair(url, html)
+
+def _processar_feed(url, limite):
+    with cronometrar("fonte", tipo="rss", url=url):
+        return obter_entradas(url, lambda response: extrair_entradas_rss(response.content), limite)
+
+def _processar_pagina(url, limite):
+    with cronometrar("fonte", tipo="html", url=url):
+        return obter_entradas(url, lambda response: extrair_entradas_html(url, response.text), limite)
+
+def filtrar_noticias(entradas, termo, termo_ingles):
+    classificador = classificador_para(termo, termo_ingles)
+    return [
+        {"titulo": entrada["titulo"], "link": entrada["link"]}
+        for entrada in entradas
+        if classificador.classificar(entrada["titulo"] + " " + (entrada.get("resumo") or ""))
     ]
-    
-    for feed_url in feeds: 
-        try:
-            feed = feedparser.parse(feed_url)
-            for entry in feed.entries:
-                title = entry.title
-                link = entry.link
-                summary = entry.get("summary", "")
-                
-                content = (title + " " + summary).lower()
-                if (termo.lower() in content or termo_ingles.lower() in content) and \
-                   any(palavra in content for palavra in palavras_relevantes) and \
-                   not any(palavra in content for palavra in palavras_ignorar):
-                    noticias.append({"titulo": title, "link": link})
-        except Exception as e:
-            print(f"Aviso: Erro ao acessar feed {feed_url}: {e}")
-    
+
+def _buscar(tarefas, termo, termo_ingles, prazo):
+    entradas = [entrada for resultado in coletar(tarefas, prazo).values() for entrada in resultado]
+    return filtrar_noticias(entradas, termo, termo_ingles)
+
+def buscar_noticias_rss(termo, termo_ingles, prazo=PRAZO_PADRAO):
+    noticias = _buscar([(url, _processar_feed) for url in FEEDS], termo, termo_ingles, prazo)
     return noticias[:5] if noticias else []
 
-def buscar_noticias_scraping(termo, termo_ingles):
-    urls = [
-        # Internacionais
-        "https://www.investing.com/news/commodities-news",  # Investing.com Commodities
-        "https://www.reuters.com/markets/commodities/",  # Reuters Commodities
-        "https://www.ft.com/commodities",  # Financial Times Commodities
-        "https://www.cnbc.com/commodities/",  # CNBC Commodities
-        "https://www.thestreet.com/markets",  # TheStreet Markets
-        "https://www.bloomberg.com/markets/commodities",  # Bloomberg Commodities
-        "https://www.barchart.com/news/commodities",  # Barchart News
-        "https://www.agriculture.com/markets/commodities",  #
-        # Brasileiras
-        "https://www.valor.com.br/agro/",  # Valor Econômico Agro
-        "https://www.estadao.com.br/economia/agronegocio/",  # Estadão Agronegócio
-        "https://www1.folha.uol.com.br/mercado/",  # Folha Mercado
-        "https://exame.com/economia/agro/",  # Exame Agronegócio
-        "https://revistagloborural.globo.com/mercado/",  # Globo Rural Mercado
-        "https://www.canalrural.com.br/noticias/mercado/",  # Canal Rural Mercado
-        "https://www.noticiasagricolas.com.br/noticias/cafe/",  # Notícias Agrícolas Café
-        "https://g1.globo.com/economia/agronegocios/",  # G1 Agronegócio
-        "https://www.ocafezinho.com/categoria/economia/"  # O Cafezinho Economia
-    ]
-    
-    noticias = []
-    palavras_relevantes = [
-        "price", "market", "futures", "export", "production", "supply", "demand", "commodity", "tariff",
-        "preço", "mercado", "exportação", "produção", "oferta", "demanda", "safra", "clima", "arábica",
-        "robusta", "cotação", "bolsa", "commodities"
-    ]
-    palavras_ignorar = [
-        "recipe", "cooking", "culinary", "lifestyle", "health", "diet", "consumer", "receita", "culinária",
-        "estilo de vida", "saúde", "dieta", "café da manhã", "barista", "promoção", "loja"
-    ]
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Referer": "https://www.google.com/"
-    }
-    
-    for url in urls:
-        try:
-            time.sleep(1)  
-            response = requests.get(url, headers=headers, timeout=15, allow_redirects=True)
-            if response.status_code != 200:
-                print(f"Aviso: Erro HTTP {response.status_code} ao acessar {url}")
-                continue
-            
-            soup = BeautifulSoup(response.text, "html.parser")
-            if "investing.com" in url:
-                articles = soup.select("article a.title, a.js-article-title, h3 a")
-            elif "reuters.com" in url:
-                articles = soup.select("article a[data-testid='Heading'], h3 a, a.story-title")
-            elif "ft.com" in url:
-                articles = soup.select("a.js-teaser-heading-link, h3 a")
-            elif "cnbc.com" in url:
-                articles = soup.select("div.Card-title a, h3 a")
-            elif "thestreet.com" in url:
-                articles = soup.select("h3 a, a.article-title")
-            elif "bloomberg.com" in url:
-                articles = soup.select("article a.headline, h3 a")
-            elif "barchart.com" in url:
-                articles = soup.select("h4 a, a.news-title")
-            elif "agriculture.com" in url:
-                articles = soup.select("h3 a, a.article-title")
-            elif "valor.com.br" in url:
-                articles = soup.select("h2.teaser__title a, h3 a")
-            elif "estadao.com.br" in url:
-                articles = soup.select("h3 a, a.article-title")
-            elif "folha.uol.com.br" in url:
-                articles = soup.select("h2.c-headline__title a, h3 a")
-            elif "exame.com" in url:
-                articles = soup.select("h3 a, a.post-title")
-            elif "globorural.globo.com" in url:
-                articles = soup.select("h2.post-title a, h3 a")
-            elif "canalrural.com.br" in url:
-                articles = soup.select("h2 a, a.post-title")
-            elif "noticiasagricolas.com.br" in url:
-                articles = soup.select("h3 a, a.news-title")
-            elif "g1.globo.com" in url:
-                articles = soup.select("h2 a, a.post-title")
-            elif "ocafezinho.com" in url:
-                articles = soup.select("h2 a, a.entry-title")
-            else:
-                articles = []
-            
-            for article in articles:
-                title = article.text.strip()
-                link = article.get("href", "")
-                if not link.startswith("http"):
-                    base_url = url.split("/")[0] + "//" + url.split("/")[2]
-                    link = base_url + link
-                
-                content = title.lower()
-                if (termo.lower() in content or termo_ingles.lower() in content) and \
-                   any(palavra in content for palavra in palavras_relevantes) and \
-                   not any(palavra in content for palavra in palavras_ignorar):
-                    noticias.append({"titulo": title, "link": link})
-        
-        except Exception as e:
-            print(f"Aviso: Erro ao fazer scraping em {url}: {e}")
-    
+def buscar_noticias_scraping(termo, termo_ingles, prazo=PRAZO_PADRAO):
+    noticias = _buscar([(url, _processar_pagina) for url in URLS_SCRAPING], termo, termo_ingles, prazo)
     return noticias[:5] if noticias else []
 
-def buscar_noticias(termo, ticker):
-    termos_ingles = {
-        # Metais
-        "Ouro": "gold", "Prata": "silver", "Platina": "platinum", "Paládio": "palladium", "Cobre": "copper",
-        # Energia
-        "Petróleo WTI": "WTI oil", "Petróleo Brent": "Brent oil", "Gás Natural": "natural gas",
-        "Gasolina RBOB": "gasoline", "Óleo de Aquecimento": "heating oil",
-        # Grãos e Agricultura
-        "Milho": "corn", "Soja": "soybean", "Trigo": "wheat", "Trigo Vermelho": "red wheat",
-        "Farelo de Soja": "soybean meal", "Óleo de Soja": "soybean oil", "Aveia": "oats",
-        # Carnes
-        "Gado Vivo": "live cattle", "Carne de Porco": "lean hogs", "Gado de Corte": "feeder cattle",
-        # Soft Commodities
-        "Açúcar": "sugar", "Cacau": "cocoa", "Café Arábica": "coffee", "Algodão": "cotton",
-        "Suco de Laranja": "orange juice", "Madeira": "lumber",
-        # Outros
-        "Índice Dólar": "dollar index"
-    }
-    termo_ingles = termos_ingles.get(termo, termo.lower())
-    
-    noticias_rss = buscar_noticias_rss(termo, termo_ingles)
-    noticias_scraping = buscar_noticias_scraping(termo, termo_ingles)
-    
-    noticias = noticias_rss + noticias_scraping
-    noticias_unicas = []
-    links_vistos = set()
-    for noticia in noticias:
-        if noticia["link"] not in links_vistos:
-            noticias_unicas.append(noticia)
-            links_vistos.add(noticia["link"])
-    
-    if noticias_unicas:
-        return noticias_unicas[:5]
+def _todas_as_fontes():
+    return [(url, _processar_feed) for url in FEEDS] + [(url, _processar_pagina) for url in URLS_SCRAPING]
+
+@instrumentar("ingestao_noticias")
+def ingerir_noticias(prazo=PRAZO_PADRAO):
+    """Coleta todas as fontes e grava os artigos no índice local. Retorna quantos eram novos."""
+    inicio = time.time()
+    artigos_por_fonte = coletar(_todas_as_fontes(), prazo)
+    conexao = conectar()
+    try:
+        novos = gravar_artigos(conexao, artigos_por_fonte, inicio)
+        incrementar("artigos_novos", novos)
+        return novos
+    finally:
+        conexao.close()
+
+class IngestorNoticias(TarefaPeriodica):
+    descricao = "na ingestão de notícias"
+
+    def __init__(self, intervalo=INTERVALO_INGESTAO, exibir_log=False):
+        super().__init__("ingestor-noticias", intervalo, exibir_log)
+
+    def ultima_execucao(self):
+        # Outro processo (ou a primeira consulta) pode ter acabado de coletar
+        conexao = conectar()
+        try:
+            return ultima_ingestao(conexao)
+        finally:
+            conexao.close()
+
+    def executar(self):
+        novos = ingerir_noticias()
+        if self.exibir_log:
+            print(f"Ingestão concluída: {novos} artigos novos")
+
+_ingestor = None
+_trava_ingestor = threading.Lock()
+
+def iniciar_ingestor(intervalo=INTERVALO_INGESTAO):
+    global _ingestor
+    with _trava_ingestor:
+        if _ingestor is None or not _ingestor.is_alive():
+            _ingestor = IngestorNoticias(intervalo)
+            _ingestor.start()
+        return _ingestor
+
+@instrumentar("busca_noticias")
+def buscar_noticias(termo, ticker, prazo=PRAZO_PADRAO):
+    termo_ingles = TERMOS_INGLES.get(termo, termo.lower())
+
+    conexao = conectar()
+    try:
+        if ultima_ingestao(conexao) is None:
+            # Índice vazio: apenas a primeira consulta espera uma coleta completa
+            ingerir_noticias(prazo)
+        iniciar_ingestor()
+        artigos = consultar(conexao, [termo, termo_ingles])
+    finally:
+        conexao.close()
+
+    noticias = filtrar_noticias(artigos, termo, termo_ingles)
+    if noticias:
+        return noticias[:5]
     
     return {"mensagem": f"Nenhuma notícia relevante encontrada para {termo} via RSS ou scraping."}
 
-if __name__ == "__main__":
+@instrumentar("busca_noticias_lote")
+def buscar_noticias_lote(tickers, limite_por_ticker=200):
+    """{ticker: resultado de buscar_noticias} com uma única consulta ao índice para todos os tickers.
+
+    Os artigos recentes que citam algum dos termos são lidos uma vez e distribuídos por ticker
+    pelo classificador; não coleta nem inicia o ingestor (quem chama decide quando ingerir).
+    """
+    termos = {}
+    for ticker in tickers:
+        nome = obter_nome_commodity(ticker)
+        termos[ticker] = [nome, TERMOS_INGLES.get(nome, nome.lower())]
+    classificador = (
+        classificador_padrao() if all(t in TICKERS_VALIDOS for t in tickers) else ClassificadorNoticias(termos)
+    )
+
+    conexao = conectar()
+    try:
+        artigos = consultar(conexao, sorted({t for lista in termos.values() for t in lista}),
+                            limite=limite_por_ticker * len(termos))
+    finally:
+        conexao.close()
+
+    por_ticker = classificador.classificar_lote(artigos)
+    resultado = {}
+    for ticker, (termo, _) in termos.items():
+        noticias = [{"titulo": a["titulo"], "link": a["link"]} for a in por_ticker.get(ticker, [])[:5]]
+        resultado[ticker] = noticias or {
+            "mensagem": f"Nenhuma notícia relevante encontrada para {termo} via RSS ou scraping."
+        }
+    return resultado
+
+if __name__ == "__main__" and "--ingerir" in sys.argv:
+    # Modo serviço: python noticias.py --ingerir [intervalo_em_segundos]
+    argumentos = [a for a in sys.argv[1:] if a != "--ingerir"]
+    ingestor = IngestorNoticias(int(argumentos[0]) if argumentos else INTERVALO_INGESTAO, exibir_log=True)
+    ingestor.run()
+elif __name__ == "__main__":
     ticker = input("Digite o código da commodity (ex: KC=F para Café): ").strip().upper()
     nome_commodity = obter_nome_commodity(ticker)
     noticias = buscar_noticias(nome_commodity, ticker)
@@ -1,30 +1,57 @@
+import os
+import copy
 import numpy as np
 import pandas as pd
-import yfinance as yf
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader, TensorDataset
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import mean_squared_error
-from datetime import datetime
-import matplotlib.pyplot as plt
-import time
-from tenacity import retry, stop_after_attempt, wait_random_exponential
-
-def compute_rsi(data, periods=14):
-    delta = data.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=periods).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=periods).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
-
-def compute_macd(data, short=12, long=26, signal=9):
-    exp1 = data.ewm(span=short, adjust=False).mean()
-    exp2 = data.ewm(span=long, adjust=False).mean()
-    macd = exp1 - exp2
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
-    return macd - signal_line
+from armazenamento import obter_historico, TICKER_DOLAR
+from indicadores import obter_indicadores, COLUNAS_INDICADORES
+from janelas import criar_janelas, para_tensor
+from normalizacao import MinMaxScaler, mean_squared_error
+from metricas import cronometrar, incrementar, instrumentar
+from registro_modelos import (
+    familia_modelo, chave_modelo, carregar_modelo, carregar_scaler, carregar_ultimo_modelo, salvar_modelo,
+    IDADE_MAXIMA_PADRAO
+)
+
+SEQ_LENGTH = 45
+COLUNAS = ['Close', 'Close_MA', 'RSI', 'MACD', 'Volatility', 'Volume', 'Dollar']
+CONFIG_MODELO = {"hidden_size": 128, "num_layers": 2, "output_size": 1, "dropout": 0.2}
+
+# Fine-tuning diário: épocas sobre as janelas novas e limites para voltar ao treino completo
+EPOCAS_AJUSTE = 3
+MAX_AJUSTES = 20
+TOLERANCIA_RMSE = 0.10
+TOLERANCIA_ESCALA = 0.05
+
+# Previsão multi-horizonte: dias à frente e bandas via MC dropout
+HORIZONTE_PADRAO = 1
+AMOSTRAS_MC = 200
+QUANTIS = (0.05, 0.5, 0.95)
+# Últimos pontos do conjunto de teste devolvidos para o gráfico
+PONTOS_GRAFICO = 60
+# Treino em CPU: tamanho do lote, threads do torch (vazio = padrão do torch) e torch.compile opcional
+TAMANHO_LOTE = int(os.environ.get("COMODOS_TAMANHO_LOTE", 32))
+THREADS_TORCH = os.environ.get("COMODOS_THREADS_TORCH")
+COMPILAR = os.environ.get("COMODOS_TORCH_COMPILE") == "1"
+# "int8" serve as previsões com o artefato TorchScript quantizado (só CPU); "float" usa o LSTMModel original
+BACKEND_PADRAO = os.environ.get("COMODOS_BACKEND_INFERENCIA", "float")
+
+_threads_configuradas = False
+
+def configurar_threads(threads=None):
+    """Threads do torch: o argumento, se dado, senão COMODOS_THREADS_TORCH (uma vez por processo).
+
+    Chamado no treino, não na importação; um valor explícito (ex.: workers do lote) não é sobrescrito depois.
+    """
+    global _threads_configuradas
+    if threads:
+        torch.set_num_threads(int(threads))
+        _threads_configuradas = True
+    elif THREADS_TORCH and not _threads_configuradas:
+        torch.set_num_threads(int(THREADS_TORCH))
+        _threads_configuradas = True
 
 class LSTMModel(nn.Module):
     def __init__(self, input_size, hidden_size=128, num_layers=2, output_size=1, dropout=0.2):
@@ -36,177 +63,416 @@ class LSTMModel(nn.Module):
         lstm_out, _ = self.lstm(x)
         return self.fc(lstm_out[:, -1, :])
 
-def preprocessar_dados(data, seq_length=45):
-    scaler = MinMaxScaler()
-    scaled_data = scaler.fit_transform(data)
+@instrumentar("preprocessar_dados")
+def preprocessar_dados(data, seq_length=SEQ_LENGTH, scaler=None, horizonte=1):
+    if scaler is None:
+        scaler = MinMaxScaler()
+        scaled_data = scaler.fit_transform(data)
+    else:
+        scaled_data = scaler.transform(data)
 
-    X, y = [], []
-    for i in range(seq_length, len(scaled_data)):
-        X.append(scaled_data[i-seq_length:i])
-        y.append(scaled_data[i, 0])
+    X, y = criar_janelas(scaled_data, seq_length, horizonte)
+    return X, y, scaler
 
-    return np.array(X), np.array(y).reshape(-1, 1), scaler
+def montar_features(historico, indicadores, dollar_close=None):
+    """Junta OHLCV, indicadores e dólar nas colunas usadas pelo modelo."""
+    data = historico.copy()
+    data[COLUNAS_INDICADORES] = indicadores[COLUNAS_INDICADORES]
+    if dollar_close is None:
+        data['Dollar'] = 0.0
+    else:
+        data['Dollar'] = dollar_close.reindex(data.index, method='ffill')
+    return data[COLUNAS].dropna()
 
-@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=1, min=4, max=10))
+@instrumentar("obter_dados")
 def obter_dados(ticker, start_date="2023-01-01"):
-    """Versão com tratamento de rate limit"""
-    time.sleep(max(0.5, np.random.rand())) 
-    
-    hoje = datetime.now().date()
+    historico = obter_historico(ticker, start_date)
+
+    if historico.empty or len(historico) < 100:
+        raise ValueError("Dados insuficientes ou ticker inválido.")
+
+    # Apenas os candles novos desde a última execução são calculados
+    indicadores = obter_indicadores(ticker, historico['Close'], start_date)
+
     try:
-        data = yf.download(
-            ticker, 
-            start=start_date, 
-            end=hoje.strftime("%Y-%m-%d"), 
-            progress=False,
-            threads=False
-        )
-        
-        if data.empty or len(data) < 100:
-            raise ValueError("Dados insuficientes ou ticker inválido.")
-
-        data['Close_MA'] = data['Close'].rolling(window=7).mean()
-        data['RSI'] = compute_rsi(data['Close'])
-        data['MACD'] = compute_macd(data['Close'])
-        data['Volatility'] = data['Close'].rolling(window=14).std()
-        data['Volume'] = data['Volume']
-
-        try:
-            time.sleep(1) 
-            dollar_data = yf.download(
-                "DX-Y.NYB", 
-                start=start_date, 
-                end=hoje.strftime("%Y-%m-%d"),
-                progress=False,
-                threads=False
-            )
-            data['Dollar'] = dollar_data['Close'].reindex(data.index, method='ffill')
-        except:
-            data['Dollar'] = 0.0
-
-        return data[['Close', 'Close_MA', 'RSI', 'MACD', 'Volatility', 'Volume', 'Dollar']].dropna()
-        
-    except Exception as e:
-        if "Rate limited" in str(e):
-            time.sleep(10) 
-        raise
-
-def plot_predictions(y_test, predicted_prices, scaler, data, ticker, predicted_next):
-    y_test_inv = scaler.inverse_transform(
-        np.concatenate([y_test, np.zeros((y_test.shape[0], data.shape[1]-1))], axis=1)
-    )[:, 0]
-    predicted_inv = scaler.inverse_transform(
-        np.concatenate([predicted_prices, np.zeros((predicted_prices.shape[0], data.shape[1]-1))], axis=1)
-    )[:, 0]
-
-    plt.figure(figsize=(10, 6))
-    plt.plot(range(len(y_test_inv)), y_test_inv, label="Real")
-    plt.plot(range(len(predicted_inv)), predicted_inv, label="Previsto")
-    plt.axvline(x=len(y_test_inv)-1, color='r', linestyle='--', label="Último Dia")
-    plt.plot([len(y_test_inv)-1, len(y_test_inv)], [y_test_inv[-1], predicted_next], 'go-', label="Previsão Amanhã")
-    plt.xlim(len(y_test_inv)-60, len(y_test_inv)+1)
-    plt.title(f"Previsões para {ticker}")
-    plt.xlabel("Dias")
-    plt.ylabel("Preço (USD)")  
-    plt.legend()
-    plt.savefig(f"{ticker}_predictions.png")
-    plt.close()
+        # Série do dólar compartilhada entre todos os tickers no cache local
+        dollar_close = obter_historico(TICKER_DOLAR, start_date)['Close']
+    except Exception:
+        dollar_close = None
+    if dollar_close is not None and dollar_close.empty:
+        # Sem dólar, Dollar=0.0; uma série vazia viraria NaN e o dropna apagaria todas as linhas
+        dollar_close = None
+
+    return montar_features(historico, indicadores, dollar_close)
+
+@instrumentar("plot_predictions")
+def plot_predictions(resultado, ticker, caminho):
+    """Exporta para arquivo o gráfico de um resultado de executar_previsao.
+
+    O matplotlib só é importado aqui; Figure (sem pyplot) não tem estado global e pode ser usada em threads.
+    """
+    from matplotlib.figure import Figure
+
+    grafico, faixa = resultado["grafico"], resultado["horizonte"]
+    datas = pd.to_datetime(grafico["datas"])
+    data_atual = pd.Timestamp(resultado["data_atual"])
+    datas_futuras = pd.to_datetime(faixa["datas"])
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(datas, grafico["real"], label="Real")
+    ax.plot(datas, grafico["previsto"], label="Previsto")
+    ax.axvline(x=data_atual, color='r', linestyle='--', label="Último Dia")
+    ax.plot([data_atual, *datas_futuras], [resultado["preco_atual"], *faixa["previsao"]], 'go-', label="Previsão")
+    ax.fill_between(datas_futuras, faixa["inferior"], faixa["superior"], color='g', alpha=0.2, label="Intervalo de 90%")
+    ax.set_title(f"Previsões para {ticker}")
+    ax.set_xlabel("Data")
+    ax.set_ylabel("Preço (USD)")
+    ax.legend()
+    fig.autofmt_xdate()
+    fig.savefig(caminho)
 
 def direction_accuracy(y_true, y_pred):
     y_true_diff = np.diff(y_true.flatten())
     y_pred_diff = np.diff(y_pred.flatten())
     correct = np.sum((y_true_diff > 0) == (y_pred_diff > 0))
-    return correct / (len(y_true_diff) - 1) if len(y_true_diff) > 1 else 0.0
+    return correct / len(y_true_diff) if len(y_true_diff) > 0 else 0.0
 
-def executar_previsao(ticker, exibir_log=True):
+def _compilar(model, exemplo):
+    """torch.compile quando COMODOS_TORCH_COMPILE=1; se o backend não estiver disponível, segue em modo eager."""
+    if not COMPILAR:
+        return model
     try:
-        if isinstance(ticker, str) and ticker.endswith('=F'):
-            time.sleep(2)
-            
+        compilado = torch.compile(model)
+        # A compilação só acontece na primeira chamada; é ali que falta de compilador aparece
+        compilado(exemplo)
+        return compilado
+    except Exception as e:
+        print(f"Aviso: torch.compile indisponível, treinando em modo eager: {e}")
+        return model
+
+def _epoca(model, otimizador, X, y, tamanho_lote):
+    """Uma época sobre lotes de índices embaralhados; devolve a soma das perdas como tensor (sem sincronizar)."""
+    n = X.shape[0]
+    perda_total = torch.zeros((), device=X.device)
+    for indices in torch.randperm(n, device=X.device).split(tamanho_lote):
+        otimizador.zero_grad(set_to_none=True)
+        loss = torch.mean((model(X[indices]) - y[indices]) ** 2)
+        loss.backward()
+        otimizador.step()
+        perda_total += loss.detach() * len(indices)
+    return perda_total
+
+def _mse(model, X, y):
+    model.eval()
+    with torch.no_grad():
+        return torch.mean((model(X) - y) ** 2).item()
+
+@instrumentar("treino")
+def treinar_modelo(X_train, y_train, X_val, y_val, device, exibir_log=True, epochs=25, patience=7, tamanho_lote=TAMANHO_LOTE):
+    configurar_threads()
+    X_train_tensor = para_tensor(X_train).to(device)
+    y_train_tensor = para_tensor(y_train).to(device)
+    X_val_tensor = para_tensor(X_val).to(device)
+    y_val_tensor = para_tensor(y_val).to(device)
+
+    model = LSTMModel(input_size=X_train.shape[2], **dict(CONFIG_MODELO, output_size=y_train.shape[1])).to(device)
+    modelo_treino = _compilar(model, X_train_tensor[:2])
+    optimizer = optim.Adam(model.parameters(), lr=0.0003)
+    scheduler = optim.lr_scheduler.StepLR(optimizer, step_size=10, gamma=0.8)
+
+    best_val_loss = float('inf')
+    trigger = 0
+    best_model = None
+
+    for epoch in range(epochs):
+        modelo_treino.train()
+        epoch_loss = _epoca(modelo_treino, optimizer, X_train_tensor, y_train_tensor, tamanho_lote)
+
+        scheduler.step()
+        incrementar("epocas_treino")
+
+        # Uma sincronização por época, necessária para o early stopping
+        val_loss = _mse(modelo_treino, X_val_tensor, y_val_tensor)
+
+        if val_loss < best_val_loss:
+            best_val_loss = val_loss
+            trigger = 0
+            # state_dict() devolve referências aos pesos; sem cópia o "melhor" seria sempre o último
+            best_model = copy.deepcopy(model.state_dict())
+        else:
+            trigger += 1
+            if trigger >= patience:
+                break
+
+        if exibir_log and epoch % 5 == 0:
+            print(f"Epoch {epoch}, Train Loss: {epoch_loss.item() / len(X_train):.4f}, Val Loss: {val_loss:.4f}")
+
+    model.load_state_dict(best_model)
+    model.eval()
+    return model, best_val_loss
+
+def avaliar_mse(model, X, y, device):
+    return _mse(model, para_tensor(X).to(device), para_tensor(y).to(device))
+
+@instrumentar("ajuste")
+def ajustar_modelo(model, X_novos, y_novos, X_val, y_val, device, epochs=EPOCAS_AJUSTE, exibir_log=True):
+    """Fine-tuning curto de um modelo já treinado, apenas nas janelas novas.
+
+    Mantém os pesos (inclusive os originais) com menor erro de validação.
+    """
+    configurar_threads()
+    best_val_loss = avaliar_mse(model, X_val, y_val, device)
+    best_model = copy.deepcopy(model.state_dict())
+    if len(X_novos) == 0:
+        return model, best_val_loss
+
+    X_novos_tensor = para_tensor(X_novos).to(device)
+    y_novos_tensor = para_tensor(y_novos).to(device)
+    optimizer = optim.Adam(model.parameters(), lr=0.0001)
+
+    for epoch in range(epochs):
+        model.train()
+        _epoca(model, optimizer, X_novos_tensor, y_novos_tensor, TAMANHO_LOTE)
+
+        val_loss = avaliar_mse(model, X_val, y_val, device)
+        if val_loss < best_val_loss:
+            best_val_loss = val_loss
+            best_model = copy.deepcopy(model.state_dict())
+
+        if exibir_log:
+            print(f"Ajuste {epoch}, Janelas novas: {len(X_novos)}, Val Loss: {val_loss:.4f}")
+
+    model.load_state_dict(best_model)
+    model.eval()
+    return model, best_val_loss
+
+def escala_desviou(scaler, data, tolerancia=TOLERANCIA_ESCALA):
+    """True se algum valor novo sair da faixa usada no ajuste do scaler além da tolerância."""
+    faixa = np.where(scaler.data_range_ > 0, scaler.data_range_, 1.0)
+    abaixo = (scaler.data_min_ - data.min(axis=0)) / faixa
+    acima = (data.max(axis=0) - scaler.data_max_) / faixa
+    return bool(np.any(abaixo > tolerancia) or np.any(acima > tolerancia))
+
+def dividir_dados(X, y):
+    train_size = int(len(X) * 0.7)
+    val_size = int(len(X) * 0.15)
+
+    X_train, X_val, X_test = X[:train_size], X[train_size:train_size+val_size], X[train_size+val_size:]
+    y_train, y_val, y_test = y[:train_size], y[train_size:train_size+val_size], y[train_size+val_size:]
+    return X_train, X_val, X_test, y_train, y_val, y_test
+
+def carregar_lstm(state_dict, input_size, device):
+    """LSTMModel em modo de avaliação com os pesos de um registro (o horizonte vem da camada de saída)."""
+    horizonte = state_dict["fc.weight"].shape[0]
+    model = LSTMModel(input_size=input_size, **dict(CONFIG_MODELO, output_size=horizonte)).to(device)
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model
+
+def _ajustar_anterior(anterior, data, horizonte, device, exibir_log):
+    """Tenta atualizar o último checkpoint do ticker; retorna None quando é preciso treinar do zero."""
+    state_dict, scaler, metadados = anterior
+    data_corte = data.index[-1].strftime("%Y-%m-%d")
+    if metadados.get("data_corte", "") >= data_corte:
+        # Mesmo corte (modelo expirado por idade): ajustar sem dados novos só regravaria os mesmos pesos
+        motivo = "nenhum dado novo desde o checkpoint anterior"
+    elif metadados.get("ajustes", 0) >= MAX_AJUSTES:
+        motivo = f"{MAX_AJUSTES} ajustes seguidos"
+    elif escala_desviou(scaler, data.values):
+        motivo = "valores fora da escala do modelo anterior"
+    else:
+        motivo = None
+
+    if motivo is None:
+        # Mantém o scaler antigo: os pesos foram aprendidos nessa escala
+        X, y, _ = preprocessar_dados(data.values, scaler=scaler, horizonte=horizonte)
+        X_train, X_val, _, y_train, y_val, _ = dividir_dados(X, y)
+
+        # Janelas de treino cujo alvo é posterior ao fim do treino anterior
+        datas_alvo = data.index[SEQ_LENGTH:]
+        inicio = datas_alvo.searchsorted(pd.Timestamp(metadados["fim_treino"]), side="right")
+
+        if inicio < len(X_train):
+            model = carregar_lstm(state_dict, X.shape[2], device)
+            model, val_loss = ajustar_modelo(model, X_train[inicio:], y_train[inicio:], X_val, y_val, device, exibir_log=exibir_log)
+            val_rmse = float(np.sqrt(val_loss))
+
+            if val_rmse <= metadados["val_rmse"] * (1 + TOLERANCIA_RMSE):
+                return model, scaler, {
+                    "val_rmse": val_rmse,
+                    "fim_treino": datas_alvo[len(X_train) - 1].strftime("%Y-%m-%d"),
+                    "ajustes": metadados.get("ajustes", 0) + 1,
+                }
+            motivo = f"RMSE de validação piorou ({metadados['val_rmse']:.4f} -> {val_rmse:.4f})"
+        else:
+            motivo = "nenhuma janela de treino nova"
+
+    if exibir_log:
+        print(f"Treinando do zero: {motivo}")
+    return None
+
+def _carregar_int8(chave, idade_maxima):
+    """(scaler, (módulo int8, relatório)) da chave sem tocar nos pesos float, ou None."""
+    from quantizacao import carregar_quantizado
+    leve = carregar_scaler(chave, idade_maxima)
+    quantizado = carregar_quantizado(chave) if leve is not None else None
+    return (leve[0], quantizado) if quantizado is not None else None
+
+def _exportar_int8(chave, model, X_test, y_test, scaler, obrigatorio):
+    """Exporta o artefato int8 do modelo salvo; falhas só interrompem a previsão se o backend for int8."""
+    from quantizacao import exportar
+    try:
+        return exportar(chave, model, X_test, y_test, scaler)
+    except Exception as e:
+        if obrigatorio:
+            raise
+        print(f"Aviso: Falha ao exportar o modelo int8 de {chave}: {e}")
+        return None
+
+def desnormalizar_close(valores, scaler):
+    """Converte valores escalados da coluna Close (a primeira) de volta para preço."""
+    return np.asarray(valores, dtype=np.float64) * scaler.data_range_[0] + scaler.data_min_[0]
+
+def prever_com_intervalos(model, janela, amostras=AMOSTRAS_MC, quantis=QUANTIS):
+    """MC dropout vetorizado: `amostras` cópias da janela passam juntas em um único forward.
+
+    Retorna um array (len(quantis), horizonte) com os quantis das previsões escaladas.
+    """
+    # expand não copia a janela; o dropout entre as camadas do LSTM sorteia máscaras por amostra
+    lote = janela.expand(amostras, -1, -1)
+    model.train()
+    try:
+        with torch.no_grad():
+            saidas = model(lote).cpu().numpy()
+    finally:
+        model.eval()
+    return np.quantile(saidas, quantis, axis=0)
+
+def executar_previsao(ticker, exibir_log=True, usar_cache=True, idade_maxima=IDADE_MAXIMA_PADRAO, incremental=True,
+                      horizonte=HORIZONTE_PADRAO, exportar_grafico=None, backend=BACKEND_PADRAO):
+    """Previsão do ticker com métricas, bandas e as séries do gráfico (listas, prontas para JSON).
+
+    exportar_grafico: caminho opcional de uma imagem do gráfico (gerada com matplotlib).
+    backend: "float" ou "int8"; o artefato int8 é exportado junto com cada modelo salvo.
+    """
+    try:
+        if backend not in ("float", "int8"):
+            raise ValueError(f"Backend de inferência desconhecido: {backend}")
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         data = obter_dados(ticker)
 
-        X, y, scaler = preprocessar_dados(data.values)
-        train_size = int(len(X) * 0.7)
-        val_size = int(len(X) * 0.15)
-
-        X_train, X_val, X_test = X[:train_size], X[train_size:train_size+val_size], X[train_size+val_size:]
-        y_train, y_val, y_test = y[:train_size], y[train_size:train_size+val_size], y[train_size+val_size:]
-
-        X_train_tensor = torch.tensor(X_train, dtype=torch.float32)
-        y_train_tensor = torch.tensor(y_train, dtype=torch.float32)
-        X_val_tensor = torch.tensor(X_val, dtype=torch.float32)
-        y_val_tensor = torch.tensor(y_val, dtype=torch.float32)
-        X_test_tensor = torch.tensor(X_test, dtype=torch.float32)
-        y_test_tensor = torch.tensor(y_test, dtype=torch.float32)
-
-        train_dataset = TensorDataset(X_train_tensor, y_train_tensor)
-        train_loader = DataLoader(train_dataset, batch_size=32, shuffle=True)
-
-        model = LSTMModel(input_size=X.shape[2], hidden_size=128, num_layers=2, output_size=1, dropout=0.2).to(device)
-        criterion = nn.MSELoss()
-        optimizer = optim.Adam(model.parameters(), lr=0.0003)
-        scheduler = optim.lr_scheduler.StepLR(optimizer, step_size=10, gamma=0.8)
-
-        epochs = 25
-        best_val_loss = float('inf')
-        patience, trigger = 7, 0
-        best_model = None
-
-        for epoch in range(epochs):
-            model.train()
-            epoch_loss = 0
-            for xb, yb in train_loader:
-                xb, yb = xb.to(device), yb.to(device)
-                optimizer.zero_grad()
-                out = model(xb)
-                loss = criterion(out, yb)
-                loss.backward()
-                optimizer.step()
-                epoch_loss += loss.item()
-
-            scheduler.step()
-
-            model.eval()
-            with torch.no_grad():
-                val_out = model(X_val_tensor.to(device)).cpu().numpy()
-                val_loss = mean_squared_error(y_val, val_out)
+        data_corte = data.index[-1].strftime("%Y-%m-%d")
+        familia = familia_modelo(ticker, COLUNAS, SEQ_LENGTH, dict(CONFIG_MODELO, output_size=horizonte))
+        chave = chave_modelo(familia, data_corte)
+        # Com int8, os pesos float não ficam no cache do processo: só o artefato quantizado e o scaler
+        manter_float = backend == "float"
+
+        quantizado = _carregar_int8(chave, idade_maxima) if usar_cache and backend == "int8" else None
+        registro = None
+        if quantizado is None and usar_cache:
+            registro = carregar_modelo(chave, idade_maxima, memoria=manter_float)
 
-            if val_loss < best_val_loss:
-                best_val_loss = val_loss
-                trigger = 0
-                best_model = model.state_dict()
+        if quantizado is not None:
+            if exibir_log:
+                print(f"Usando modelo int8 em cache para {ticker} (dados até {data_corte})")
+            incrementar("modelos", origem="cache")
+            scaler, (model, quantizacao) = quantizado
+            X, y, scaler = preprocessar_dados(data.values, scaler=scaler, horizonte=horizonte)
+        elif registro is not None:
+            if exibir_log:
+                print(f"Usando modelo em cache para {ticker} (dados até {data_corte})")
+            incrementar("modelos", origem="cache")
+            state_dict, scaler, _ = registro
+            X, y, scaler = preprocessar_dados(data.values, scaler=scaler, horizonte=horizonte)
+            model = carregar_lstm(state_dict, X.shape[2], device)
+        else:
+            anterior = carregar_ultimo_modelo(familia) if usar_cache and incremental else None
+            ajustado = _ajustar_anterior(anterior, data, horizonte, device, exibir_log) if anterior is not None else None
+
+            if ajustado is not None:
+                incrementar("modelos", origem="ajuste")
+                model, scaler, metadados = ajustado
+                X, y, scaler = preprocessar_dados(data.values, scaler=scaler, horizonte=horizonte)
             else:
-                trigger += 1
-                if trigger >= patience:
-                    break
+                incrementar("modelos", origem="treino")
+                X, y, scaler = preprocessar_dados(data.values, horizonte=horizonte)
+                X_train, X_val, _, y_train, y_val, _ = dividir_dados(X, y)
+                model, best_val_loss = treinar_modelo(X_train, y_train, X_val, y_val, device, exibir_log)
+                metadados = {
+                    "val_rmse": float(np.sqrt(best_val_loss)),
+                    "fim_treino": data.index[SEQ_LENGTH + len(X_train) - 1].strftime("%Y-%m-%d"),
+                    "ajustes": 0,
+                }
 
-            if exibir_log and epoch % 5 == 0:
-                print(f"Epoch {epoch}, Train Loss: {epoch_loss/len(train_loader):.4f}, Val Loss: {val_loss:.4f}")
+            salvar_modelo(chave, model.state_dict(), scaler, dict(
+                metadados, ticker=ticker, familia=familia, data_corte=data_corte
+            ), memoria=manter_float)
 
-        model.load_state_dict(best_model)
-        model.eval()
-        with torch.no_grad():
-            predicted_prices = model(X_test_tensor.to(device)).cpu().numpy()
-            mse = mean_squared_error(y_test, predicted_prices)
-            rmse = np.sqrt(mse)
-            dir_acc = direction_accuracy(y_test, predicted_prices)
+        _, _, X_test, _, _, y_test = dividir_dados(X, y)
+        if quantizado is None and registro is None:
+            # Modelo recém-salvo: o artefato int8 e o relatório saem junto, para qualquer backend
+            exportado = _exportar_int8(chave, model, X_test, y_test, scaler, obrigatorio=backend == "int8")
+            if backend == "int8":
+                model, quantizacao = exportado
+        elif registro is not None and backend == "int8":
+            # Registro float sem artefato int8 (salvo antes da exportação junto com o modelo)
+            from quantizacao import obter_quantizado
+            model, quantizacao = obter_quantizado(chave, model, X_test, y_test, scaler)
+        if backend == "float":
+            quantizacao = None
+        else:
+            device = torch.device("cpu")
+
+        with cronometrar("inferencia", backend=backend):
+            with torch.no_grad():
+                # Métricas sobre o primeiro passo do horizonte (dia seguinte)
+                predicted_prices = model(para_tensor(X_test).to(device)).cpu().numpy()[:, :1]
+                y_test = y_test[:, :1]
+                mse = mean_squared_error(y_test, predicted_prices)
+                rmse = np.sqrt(mse)
+                dir_acc = direction_accuracy(y_test, predicted_prices)
+
+                # A janela mais recente termina no último candle (X[-1] termina um dia antes, pois precisa de alvo)
+                ultima_janela = torch.from_numpy(scaler.transform(data.values[-SEQ_LENGTH:]).astype(np.float32))
+                ultima_janela = ultima_janela.unsqueeze(0).to(device)
+                previsao = desnormalizar_close(model(ultima_janela).cpu().numpy()[0], scaler)
 
-            last_sequence = torch.tensor(X[-1].reshape(1, X.shape[1], X.shape[2]), dtype=torch.float32).to(device)
-            predicted_next_scaled = model(last_sequence).cpu().numpy()
-            predicted_next = scaler.inverse_transform(
-                np.concatenate([predicted_next_scaled, np.zeros((1, X.shape[2]-1))], axis=1)
-            )[0][0]
+            bandas = desnormalizar_close(prever_com_intervalos(model, ultima_janela), scaler)
+        predicted_next = previsao[0]
 
         preco_atual = float(data['Close'].iloc[-1].item())
-        plot_predictions(y_test, predicted_prices, scaler, data, ticker, predicted_next)
 
-        return {
+        # A janela i prevê a linha i + SEQ_LENGTH; o teste são as últimas len(X_test) janelas
+        fim_teste = SEQ_LENGTH + len(X)
+        datas_teste = data.index[fim_teste - len(X_test):fim_teste][-PONTOS_GRAFICO:]
+        datas_futuras = [data.index[-1] + pd.offsets.BDay(dia) for dia in range(1, horizonte + 1)]
+        grafico = {
+            "datas": [d.strftime("%Y-%m-%d") for d in datas_teste],
+            "real": desnormalizar_close(y_test[-PONTOS_GRAFICO:, 0], scaler).tolist(),
+            "previsto": desnormalizar_close(predicted_prices[-PONTOS_GRAFICO:, 0], scaler).tolist(),
+        }
+
+        resultado = {
             "preco_atual": preco_atual,
+            "data_atual": data_corte,
             "previsao_amanha": predicted_next,
             "rmse": rmse,
-            "acuracia": dir_acc
+            "acuracia": dir_acc,
+            "grafico": grafico,
+            "backend": backend,
+            "quantizacao": quantizacao,
+            "horizonte": {
+                "dias": list(range(1, horizonte + 1)),
+                "datas": [d.strftime("%Y-%m-%d") for d in datas_futuras],
+                "previsao": previsao.tolist(),
+                "inferior": bandas[0].tolist(),
+                "mediana": bandas[1].tolist(),
+                "superior": bandas[2].tolist(),
+            }
         }
+        if exportar_grafico:
+            plot_predictions(resultado, ticker, exportar_grafico)
+        return resultado
 
     except Exception as e:
-        raise RuntimeError(f"Erro: {e}")
\ No newline at end of file
+        raise RuntimeError(f"Erro: {e}")
@@ -0,0 +1,124 @@
+import os
+import copy
+import json
+import time
+import threading
+import numpy as np
+import torch
+import torch.nn as nn
+from janelas import para_tensor
+from metricas import instrumentar
+from normalizacao import mean_squared_error
+from registro_modelos import DIRETORIO_MODELOS
+from arquivos import gravar_atomico, gravar_json
+from previsao import direction_accuracy, desnormalizar_close
+
+_memoria = {}
+_trava = threading.Lock()
+
+
+def _caminhos(chave):
+    base = os.path.join(DIRETORIO_MODELOS, chave)
+    return base + ".int8.pt", base + ".int8.json"
+
+
+def quantizar(model):
+    """Cópia do modelo com LSTM e Linear em int8 (pesos int8; ativações quantizadas a cada chamada)."""
+    return torch.ao.quantization.quantize_dynamic(copy.deepcopy(model).cpu().eval(), {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+
+def _tamanho_bytes(caminho):
+    try:
+        return os.path.getsize(caminho)
+    except OSError:
+        return None
+
+
+def _latencia_ms(model, X, repeticoes=5):
+    with torch.no_grad():
+        model(X)
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            model(X)
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def comparar(model_float, model_int8, X_test, y_test, scaler):
+    """Erro e latência do modelo int8 em relação ao float no mesmo conjunto de teste (CPU)."""
+    X = para_tensor(X_test).cpu()
+    model_float = model_float.cpu().eval()
+    with torch.no_grad():
+        previsto_float = model_float(X).numpy()
+        previsto_int8 = model_int8(X).numpy()
+
+    real = y_test[:, :1]
+    rmse_float = float(np.sqrt(mean_squared_error(real, previsto_float[:, :1])))
+    rmse_int8 = float(np.sqrt(mean_squared_error(real, previsto_int8[:, :1])))
+    acuracia_float = float(direction_accuracy(real, previsto_float[:, :1]))
+    acuracia_int8 = float(direction_accuracy(real, previsto_int8[:, :1]))
+    desvio_usd = np.abs(desnormalizar_close(previsto_int8, scaler) - desnormalizar_close(previsto_float, scaler))
+    return {
+        "rmse_float": rmse_float,
+        "rmse_int8": rmse_int8,
+        "delta_rmse": rmse_int8 - rmse_float,
+        "acuracia_float": acuracia_float,
+        "acuracia_int8": acuracia_int8,
+        "delta_acuracia": acuracia_int8 - acuracia_float,
+        "desvio_max_usd": float(desvio_usd.max()) if desvio_usd.size else 0.0,
+        "latencia_float_ms": _latencia_ms(model_float, X[-1:]),
+        "latencia_int8_ms": _latencia_ms(model_int8, X[-1:]),
+    }
+
+
+@instrumentar("exportar_int8")
+def exportar(chave, model, X_test=None, y_test=None, scaler=None):
+    """Quantiza, compila com TorchScript e grava ao lado do registro; com dados de teste, grava também o relatório.
+
+    torch.jit.script (e não trace) preserva o dropout, então o MC dropout continua funcionando no artefato.
+    """
+    os.makedirs(DIRETORIO_MODELOS, exist_ok=True)
+    caminho_modulo, caminho_relatorio = _caminhos(chave)
+    modulo = torch.jit.script(quantizar(model))
+    gravar_atomico(caminho_modulo, lambda p: torch.jit.save(modulo, p))
+
+    relatorio = None
+    if X_test is not None and len(X_test) > 1:
+        relatorio = comparar(model, modulo, X_test, y_test, scaler)
+        relatorio["bytes_int8"] = _tamanho_bytes(caminho_modulo)
+        relatorio["bytes_float"] = _tamanho_bytes(os.path.join(DIRETORIO_MODELOS, chave + ".pt"))
+        gravar_json(caminho_relatorio, relatorio, indent=2)
+
+    with _trava:
+        _memoria[chave] = (modulo, relatorio)
+    return modulo, relatorio
+
+
+def carregar_quantizado(chave):
+    """(módulo int8, relatório) já exportados para a chave, ou None."""
+    with _trava:
+        registro = _memoria.get(chave)
+    if registro is not None:
+        return registro
+
+    caminho_modulo, caminho_relatorio = _caminhos(chave)
+    if not os.path.exists(caminho_modulo):
+        return None
+    try:
+        modulo = torch.jit.load(caminho_modulo, map_location="cpu")
+    except Exception as e:
+        print(f"Aviso: Artefato int8 {chave} ilegível: {e}")
+        return None
+    try:
+        with open(caminho_relatorio, encoding="utf-8") as f:
+            relatorio = json.load(f)
+    except (OSError, ValueError):
+        relatorio = None
+
+    with _trava:
+        _memoria[chave] = (modulo, relatorio)
+    return modulo, relatorio
+
+
+def obter_quantizado(chave, model, X_test, y_test, scaler):
+    """Artefato int8 da chave; exporta na hora se o modelo foi salvo antes da exportação junto com o registro."""
+    return carregar_quantizado(chave) or exportar(chave, model, X_test, y_test, scaler)
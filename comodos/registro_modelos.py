@@ -0,0 +1,161 @@
+import os
+import re
+import glob
+import json
+import time
+import hashlib
+import threading
+import joblib
+import torch
+from configuracao import DIRETORIO_CACHE
+from arquivos import nome_arquivo, gravar_atomico, gravar_json
+
+DIRETORIO_MODELOS = os.path.join(DIRETORIO_CACHE, "modelos")
+
+# Idade máxima (em segundos) de um modelo salvo antes de forçar novo treino
+IDADE_MAXIMA_PADRAO = int(os.environ.get("COMODOS_IDADE_MAXIMA_MODELO", 24 * 60 * 60))
+# Quantas versões (datas de corte) de cada família são mantidas em disco
+MAX_VERSOES = int(os.environ.get("COMODOS_MAX_VERSOES_MODELO", 5))
+
+_memoria = {}
+_scalers = {}
+_trava = threading.Lock()
+
+
+def familia_modelo(ticker, colunas, seq_length, config=None):
+    """Identifica modelos compatíveis entre si: mesmo ticker, features, janela e hiperparâmetros."""
+    assinatura = json.dumps({
+        "ticker": ticker,
+        "colunas": list(colunas),
+        "seq_length": seq_length,
+        "config": config or {},
+    }, sort_keys=True)
+    resumo = hashlib.sha1(assinatura.encode("utf-8")).hexdigest()[:16]
+    return f"{nome_arquivo(ticker)}_{resumo}"
+
+
+def chave_modelo(familia, data_corte):
+    """Um modelo da família treinado com dados até data_corte (AAAA-MM-DD)."""
+    return f"{familia}_{data_corte}"
+
+
+def _caminhos(chave):
+    base = os.path.join(DIRETORIO_MODELOS, chave)
+    return base + ".pt", base + ".joblib", base + ".json"
+
+
+def salvar_modelo(chave, state_dict, scaler, metadados=None, max_versoes=MAX_VERSOES, memoria=True):
+    """Grava pesos, scaler e metadados; memoria=False não mantém os pesos float carregados no processo."""
+    os.makedirs(DIRETORIO_MODELOS, exist_ok=True)
+    caminho_pesos, caminho_scaler, caminho_meta = _caminhos(chave)
+    metadados = dict(metadados or {}, chave=chave, salvo_em=time.time())
+
+    state_dict = {k: v.detach().cpu().clone() for k, v in state_dict.items()}
+    gravar_atomico(caminho_pesos, lambda p: torch.save(state_dict, p))
+    gravar_atomico(caminho_scaler, lambda p: joblib.dump(scaler, p))
+    # Metadados por último: sua presença indica um registro completo
+    gravar_json(caminho_meta, metadados, ensure_ascii=False, indent=2)
+
+    with _trava:
+        _scalers[chave] = (scaler, metadados)
+        if memoria:
+            _memoria[chave] = (state_dict, scaler, metadados)
+        else:
+            _memoria.pop(chave, None)
+
+    if metadados.get("familia") and max_versoes is not None:
+        _podar(metadados["familia"], max_versoes)
+
+
+def _versoes(familia):
+    """Chaves salvas da família, da data de corte mais antiga para a mais recente."""
+    prefixo = os.path.join(DIRETORIO_MODELOS, familia + "_")
+    # Só <familia>_AAAA-MM-DD.json; artefatos derivados (<chave>.int8.json) não são versões
+    padrao = re.compile(re.escape(familia) + r"_\d{4}-\d{2}-\d{2}\.json")
+    return sorted(
+        nome[:-len(".json")]
+        for nome in map(os.path.basename, glob.glob(glob.escape(prefixo) + "*.json"))
+        if padrao.fullmatch(nome)
+    )
+
+
+def _podar(familia, max_versoes):
+    for chave in _versoes(familia)[:-max_versoes]:
+        with _trava:
+            _memoria.pop(chave, None)
+            _scalers.pop(chave, None)
+        # Metadados primeiro; depois pesos, scaler e artefatos derivados (ex.: <chave>.int8.pt)
+        base = os.path.join(DIRETORIO_MODELOS, chave)
+        for caminho in [*_caminhos(chave)[::-1], *glob.glob(glob.escape(base) + ".*")]:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+
+
+def _expirado(metadados, idade_maxima):
+    return idade_maxima is not None and time.time() - metadados.get("salvo_em", 0) > idade_maxima
+
+
+def carregar_scaler(chave, idade_maxima=IDADE_MAXIMA_PADRAO):
+    """Retorna (scaler, metadados) sem carregar os pesos, ou None se não houver registro válido."""
+    with _trava:
+        registro = _scalers.get(chave)
+
+    if registro is None:
+        _, caminho_scaler, caminho_meta = _caminhos(chave)
+        if not os.path.exists(caminho_meta):
+            return None
+        try:
+            with open(caminho_meta, encoding="utf-8") as f:
+                metadados = json.load(f)
+            scaler = joblib.load(caminho_scaler)
+        except Exception as e:
+            print(f"Aviso: Registro de modelo {chave} corrompido: {e}")
+            return None
+        registro = (scaler, metadados)
+        with _trava:
+            _scalers[chave] = registro
+
+    if _expirado(registro[1], idade_maxima):
+        return None
+    return registro
+
+
+def carregar_modelo(chave, idade_maxima=IDADE_MAXIMA_PADRAO, memoria=True):
+    """Retorna (state_dict, scaler, metadados) ou None se não houver modelo válido.
+
+    memoria=False lê do disco sem manter os pesos float no cache do processo.
+    """
+    with _trava:
+        registro = _memoria.get(chave)
+
+    if registro is None:
+        caminho_pesos, caminho_scaler, caminho_meta = _caminhos(chave)
+        if not os.path.exists(caminho_meta):
+            return None
+        try:
+            with open(caminho_meta, encoding="utf-8") as f:
+                metadados = json.load(f)
+            state_dict = torch.load(caminho_pesos, map_location="cpu", weights_only=True)
+            scaler = joblib.load(caminho_scaler)
+        except Exception as e:
+            print(f"Aviso: Registro de modelo {chave} corrompido: {e}")
+            return None
+        registro = (state_dict, scaler, metadados)
+        if memoria:
+            with _trava:
+                _memoria[chave] = registro
+
+    if _expirado(registro[2], idade_maxima):
+        return None
+    return registro
+
+
+def carregar_ultimo_modelo(familia):
+    """Retorna o registro mais recente da família, qualquer que seja a idade ou a data de corte."""
+    for chave in reversed(_versoes(familia)):
+        registro = carregar_modelo(chave, idade_maxima=None)
+        if registro is not None:
+            return registro
+    return None
@@ -0,0 +1,107 @@
+import re
+import unicodedata
+from functools import lru_cache
+from configuracao import TICKERS_VALIDOS, TERMOS_INGLES
+
+PALAVRAS_RELEVANTES = [
+    "price", "market", "futures", "export", "production", "supply", "demand", "commodity", "tariff",
+    "preço", "mercado", "exportação", "produção", "oferta", "demanda", "safra", "clima", "arábica",
+    "robusta", "cotação", "bolsa", "commodities"
+]
+PALAVRAS_IGNORAR = [
+    "recipe", "cooking", "culinary", "lifestyle", "health", "diet", "consumer", "receita", "culinária",
+    "estilo de vida", "saúde", "dieta", "café da manhã", "barista", "promoção", "loja"
+]
+
+
+_DIACRITICOS = re.compile("[\u0300-\u036f]")
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos, para que 'Café' e 'cafe' sejam equivalentes."""
+    texto = texto.lower()
+    if texto.isascii():
+        return texto
+    return _DIACRITICOS.sub("", unicodedata.normalize("NFKD", texto))
+
+
+def _regex_trie(palavras):
+    """Monta uma expressão em forma de trie: prefixos comuns são testados uma única vez."""
+    trie = {}
+    for palavra in palavras:
+        no = trie
+        for caractere in palavra:
+            no = no.setdefault(caractere, {})
+        no[""] = {}
+
+    def montar(no):
+        final = "" in no
+        ramos = [re.escape(c) + montar(filho) for c, filho in sorted(no.items()) if c]
+        if not ramos:
+            return ""
+        corpo = ramos[0] if len(ramos) == 1 else "(?:" + "|".join(ramos) + ")"
+        # Quantificador guloso: o termo mais longo é preferido quando ambos casam
+        return "(?:" + corpo + ")?" if final else corpo
+
+    # Sem palavras, o padrão nunca casa (equivale a any([]) == False)
+    return montar(trie) if trie else "(?!)"
+
+
+class ClassificadorNoticias:
+    """Classifica textos para várias chaves (ex.: tickers) em uma única varredura.
+
+    Um texto é relevante para uma chave quando contém algum termo dela, alguma palavra
+    de PALAVRAS_RELEVANTES e nenhuma de PALAVRAS_IGNORAR (comparação por substring,
+    sem diferenciar acentos).
+    """
+
+    def __init__(self, termos_por_chave, relevantes=PALAVRAS_RELEVANTES, ignorar=PALAVRAS_IGNORAR):
+        self._chaves_por_termo = {}
+        for chave, termos in termos_por_chave.items():
+            for termo in termos:
+                termo = normalizar(termo).strip()
+                if termo:
+                    self._chaves_por_termo.setdefault(termo, set()).add(chave)
+
+        termos = list(self._chaves_por_termo)
+        # O padrão devolve só o maior termo em cada posição; os termos contidos nele também contam
+        self._contidos = {t: [u for u in termos if u in t] for t in termos}
+        # Lookahead: testa todas as posições, inclusive as sobrepostas a um termo já encontrado
+        self._termos = re.compile("(?=(" + _regex_trie(termos) + "))") if termos else None
+        self._relevantes = re.compile(_regex_trie(normalizar(p) for p in relevantes))
+        self._ignorar = re.compile(_regex_trie(normalizar(p) for p in ignorar))
+
+    def classificar(self, texto):
+        """Retorna o conjunto de chaves para as quais o texto é relevante."""
+        conteudo = normalizar(texto)
+        if self._termos is None or not self._relevantes.search(conteudo) or self._ignorar.search(conteudo):
+            return set()
+
+        chaves = set()
+        for termo in {m.group(1) for m in self._termos.finditer(conteudo)}:
+            for contido in self._contidos[termo]:
+                chaves |= self._chaves_por_termo[contido]
+        return chaves
+
+    def classificar_lote(self, entradas):
+        """Distribui as entradas ({titulo, resumo, ...}) por chave: {chave: [entradas]}."""
+        resultado = {}
+        for entrada in entradas:
+            texto = entrada["titulo"] + " " + (entrada.get("resumo") or "")
+            for chave in self.classificar(texto):
+                resultado.setdefault(chave, []).append(entrada)
+        return resultado
+
+
+@lru_cache(maxsize=128)
+def classificador_para(termo, termo_ingles):
+    return ClassificadorNoticias({termo: [termo, termo_ingles]})
+
+
+@lru_cache(maxsize=1)
+def classificador_padrao():
+    """Classificador para todos os tickers válidos (nome em português e termo em inglês)."""
+    return ClassificadorNoticias({
+        ticker: [nome, TERMOS_INGLES.get(nome, nome.lower())]
+        for ticker, nome in TICKERS_VALIDOS.items()
+    })
@@ -0,0 +1,115 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from metricas import cronometrar, incrementar
+
+# Resultados com erro são tentados de novo depois deste intervalo, mesmo que a validade seja maior
+INTERVALO_ERRO = float(os.environ.get("COMODOS_INTERVALO_ERRO_TAREFA", 60))
+
+
+class FilaTarefas:
+    """Trabalhos em segundo plano compartilhados entre sessões, no máximo um em andamento por chave.
+
+    Guarda o último resultado de cada chave; quem consulta recebe esse resultado na hora
+    (mesmo que expirado) enquanto a atualização roda em outro thread.
+    """
+
+    def __init__(self, nome, max_workers=2):
+        self.nome = nome
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"tarefa-{nome}")
+        self._trava = threading.Lock()
+        self._em_andamento = {}
+        self._resultados = {}
+
+    def agendar(self, chave, funcao, *args, **kwargs):
+        """Agenda funcao(*args, **kwargs) para chave; se já houver uma em andamento, reaproveita o Future."""
+        with self._trava:
+            futuro = self._em_andamento.get(chave)
+            if futuro is None:
+                futuro = self._executor.submit(self._executar, chave, funcao, args, kwargs)
+                self._em_andamento[chave] = futuro
+            else:
+                incrementar("tarefas_deduplicadas", fila=self.nome)
+            return futuro
+
+    def _executar(self, chave, funcao, args, kwargs):
+        inicio = time.time()
+        resultado = {"valor": None, "erro": None}
+        try:
+            with cronometrar("tarefa", fila=self.nome):
+                resultado["valor"] = funcao(*args, **kwargs)
+        except Exception as e:
+            resultado["erro"] = str(e)
+        resultado["concluido_em"] = time.time()
+        resultado["segundos"] = resultado["concluido_em"] - inicio
+        with self._trava:
+            self._resultados[chave] = resultado
+            del self._em_andamento[chave]
+        return resultado
+
+    def em_andamento(self, chave):
+        with self._trava:
+            return chave in self._em_andamento
+
+    def obter(self, chave, funcao, *args, validade=None, **kwargs):
+        """Último resultado de chave (ou None) sem bloquear; agenda atualização se ausente ou expirado.
+
+        validade é a idade máxima em segundos de um resultado bem-sucedido (None: nunca expira).
+        """
+        with self._trava:
+            resultado = self._resultados.get(chave)
+        if resultado is None:
+            expirado = True
+        else:
+            idade = time.time() - resultado["concluido_em"]
+            limite = validade
+            if resultado["erro"]:
+                limite = INTERVALO_ERRO if validade is None else min(INTERVALO_ERRO, validade)
+            expirado = limite is not None and idade > limite
+        if expirado:
+            self.agendar(chave, funcao, *args, **kwargs)
+        return resultado
+
+    def encerrar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TarefaPeriodica(threading.Thread):
+    """Thread que executa um trabalho a cada intervalo, contado a partir da última execução registrada.
+
+    A última execução vem de ultima_execucao() (ex.: lida do disco), então outro processo que acabou
+    de executar adia esta; subclasses implementam ultima_execucao() e executar().
+    """
+
+    # Complemento de "Aviso: Erro ..." quando executar() falha
+    descricao = "na tarefa periódica"
+
+    def __init__(self, nome, intervalo, exibir_log=False):
+        super().__init__(name=nome, daemon=True)
+        self.intervalo = intervalo
+        self.exibir_log = exibir_log
+        self._parar = threading.Event()
+
+    def ultima_execucao(self):
+        """Instante (time.time()) da última execução concluída, ou None."""
+        raise NotImplementedError
+
+    def executar(self):
+        raise NotImplementedError
+
+    def run(self):
+        while not self._parar.is_set():
+            espera = (self.ultima_execucao() or 0) + self.intervalo - time.time()
+            if espera > 0:
+                self._parar.wait(espera)
+                continue
+
+            try:
+                self.executar()
+            except Exception as e:
+                print(f"Aviso: Erro {self.descricao}: {e}")
+                self._parar.wait(self.intervalo)
+
+    def parar(self):
+        self._parar.set()
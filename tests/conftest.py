@@ -0,0 +1,12 @@
+import os
+import sys
+import pytest
+
+# Os módulos de comodos/ importam uns aos outros pelo nome (from configuracao import ...)
+DIRETORIO_CODIGO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "comodos")
+sys.path.insert(0, DIRETORIO_CODIGO)
+
+
+@pytest.fixture
+def diretorio_codigo():
+    return DIRETORIO_CODIGO
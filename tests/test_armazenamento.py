@@ -0,0 +1,68 @@
+import sys
+import types
+import numpy as np
+import pandas as pd
+import pytest
+from tenacity import wait_none
+import armazenamento
+import previsao
+from indicadores import calcular_indicadores
+
+
+def _ohlcv(datas, inicio=100.0):
+    close = inicio + np.arange(len(datas), dtype=np.float64)
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(len(datas), 1000.0)}, index=datas)
+
+
+@pytest.fixture
+def yfinance_falso(monkeypatch, tmp_path):
+    """yfinance substituído: devolve OHLCV para os tickers em `com_dados` e nada para os outros."""
+    chamadas = []
+    com_dados = set()
+
+    def download(tickers, start, end, **kwargs):
+        chamadas.append(tickers)
+        lista = tickers if isinstance(tickers, list) else [tickers]
+        datas = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        frames = {t: _ohlcv(datas) for t in lista if t in com_dados}
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    monkeypatch.setitem(sys.modules, "yfinance", types.SimpleNamespace(download=download))
+    monkeypatch.setattr(armazenamento, "DIRETORIO_PRECOS", str(tmp_path))
+    monkeypatch.setattr(armazenamento._baixar.retry, "wait", wait_none())
+    return chamadas, com_dados
+
+
+def test_download_vazio_nao_e_gravado_e_tenta_de_novo(yfinance_falso):
+    chamadas, _ = yfinance_falso
+    with pytest.raises(Exception):
+        armazenamento.obter_historico(armazenamento.TICKER_DOLAR)
+    assert armazenamento._ler(armazenamento.TICKER_DOLAR) == (None, {})
+
+    # Nada foi gravado como "em dia": a consulta seguinte baixa de novo
+    tentativas = len(chamadas)
+    with pytest.raises(Exception):
+        armazenamento.obter_historico(armazenamento.TICKER_DOLAR)
+    assert len(chamadas) > tentativas
+
+
+def test_lote_ignora_tickers_vazios(yfinance_falso):
+    _, com_dados = yfinance_falso
+    com_dados.add("KC=F")
+    assert armazenamento.atualizar_historicos(["KC=F"]) == ["KC=F"]
+    assert armazenamento._ler(armazenamento.TICKER_DOLAR) == (None, {})
+    assert not armazenamento._ler("KC=F")[0].empty
+
+
+def test_dolar_vazio_vira_zero(monkeypatch):
+    datas = pd.bdate_range("2023-01-02", periods=200)
+    historico = _ohlcv(datas)
+    vazio = historico.iloc[:0]
+    monkeypatch.setattr(previsao, "obter_historico", lambda t, s: vazio if t == armazenamento.TICKER_DOLAR else historico)
+    monkeypatch.setattr(previsao, "obter_indicadores", lambda t, close, s: calcular_indicadores(close))
+
+    data = previsao.obter_dados("KC=F")
+    assert len(data) > 100
+    assert (data["Dollar"] == 0.0).all()
+
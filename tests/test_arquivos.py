@@ -0,0 +1,46 @@
+import os
+import json
+import pytest
+from arquivos import nome_arquivo, gravar_atomico, gravar_json, gravar_texto
+
+
+def test_nome_arquivo():
+    assert nome_arquivo("KC=F") == "KC_F"
+    assert nome_arquivo("PETR4.SA") == "PETR4_SA"
+    assert nome_arquivo("DX-Y.NYB") == "DX_Y_NYB"
+
+
+def test_gravar_json_e_texto(tmp_path):
+    caminho = str(tmp_path / "dados.json")
+    gravar_json(caminho, {"nome": "Café"}, ensure_ascii=False)
+    with open(caminho, encoding="utf-8") as f:
+        assert json.load(f) == {"nome": "Café"}
+
+    gravar_texto(str(tmp_path / "ATUAL"), "v2")
+    assert (tmp_path / "ATUAL").read_text(encoding="utf-8") == "v2"
+    assert sorted(os.listdir(tmp_path)) == ["ATUAL", "dados.json"]
+
+
+def test_falha_preserva_o_arquivo_anterior_e_remove_o_temporario(tmp_path):
+    caminho = str(tmp_path / "dados.json")
+    gravar_json(caminho, [1])
+
+    def gravar_pela_metade(temporario):
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write("[1, 2")
+        raise RuntimeError("disco cheio")
+
+    with pytest.raises(RuntimeError):
+        gravar_atomico(caminho, gravar_pela_metade)
+    with open(caminho, encoding="utf-8") as f:
+        assert json.load(f) == [1]
+    assert os.listdir(tmp_path) == ["dados.json"]
+
+
+def test_sufixo_preserva_a_extensao(tmp_path):
+    np = pytest.importorskip("numpy")
+    caminho = str(tmp_path / "tabela.npz")
+    gravar_atomico(caminho, lambda temporario: np.savez(temporario, valores=np.arange(3)), sufixo=".npz")
+    with np.load(caminho) as arquivo:
+        assert arquivo["valores"].tolist() == [0, 1, 2]
+    assert os.listdir(tmp_path) == ["tabela.npz"]
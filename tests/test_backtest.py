@@ -0,0 +1,31 @@
+import pandas as pd
+import backtest
+
+
+def test_backtest_sem_dobras_devolve_tabela_vazia(tmp_path):
+    # Fixture inexistente: o ticker é ignorado e não sobra nenhuma dobra
+    resultados = backtest.executar_backtest(["KC=F"], fixtures=str(tmp_path), max_workers=1)
+    assert resultados.empty
+    assert list(resultados.columns) == backtest.COLUNAS_RESULTADO
+    assert backtest.resumir(resultados).empty
+
+
+def test_resumir_com_todas_as_dobras_com_erro():
+    linhas = [{"ticker": "KC=F", "dobra": k, "reutilizado": False, "erro": "falhou", "t_download": 0.1} for k in range(3)]
+    resultados = pd.DataFrame(linhas).reindex(columns=backtest.COLUNAS_RESULTADO)
+    resumo = backtest.resumir(resultados)
+    assert resumo.loc["KC=F", "dobras"] == 3
+    assert resumo.loc["KC=F", "erros"] == 3
+    assert "rmse" not in resumo.columns
+
+
+def test_resumir_mistura_dobras_ok_e_com_erro():
+    linhas = [
+        {"ticker": "KC=F", "dobra": 0, "rmse": 0.1, "reutilizado": True, "erro": None, "rss_max_worker_mb": 500.0},
+        {"ticker": "KC=F", "dobra": 1, "reutilizado": False, "erro": "falhou"},
+    ]
+    resumo = backtest.resumir(pd.DataFrame(linhas).reindex(columns=backtest.COLUNAS_RESULTADO))
+    assert resumo.loc["KC=F", "rmse"] == 0.1
+    assert resumo.loc["KC=F", "erros"] == 1
+    assert resumo.loc["KC=F", "reutilizados"] == 1
+    assert resumo.loc["KC=F", "rss_max_worker_mb"] == 500.0
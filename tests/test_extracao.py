@@ -0,0 +1,51 @@
+import pytest
+from extracao import backend_disponivel, tags_do_seletor, _selecionar_bs4, extrair
+
+bs4 = pytest.importorskip("bs4")
+
+HTML = """
+<html><body>
+  <div class="story"><a href="/1">Café sobe</a></div>
+  <section class="headline"><span><a href="/2">Soja recua</a></span></section>
+  <div><span><a href="/3">Milho estável</a></span><a href="/4">Ouro dispara</a></div>
+  <ul><li><a href="/5">Primeiro</a></li><li><a href="/6">Segundo</a></li></ul>
+  <h2>Título</h2><span>intruso</span><a href="/7">Depois do h2</a>
+  <h3><a href="/8">Petróleo cai</a></h3>
+  <article><a class="title" data-testid="Heading" href="/9">Trigo</a></article>
+</body></html>
+"""
+
+SELETORES = [
+    ".story a", ".headline a", "section.headline a", "div.story > a", "div > a", "div a",
+    "li:first-child a", "h2 + a", "h2 ~ a", "h3 a, .story a", "h3 a", "ul li a",
+    "article a[data-testid='Heading']", "article a.title, h3 a", "* > a",
+]
+PARSERS = [p for p in ("html.parser", "lxml") if backend_disponivel(p)]
+
+
+def _parse_completo(html, seletor, parser):
+    soup = bs4.BeautifulSoup(html, parser)
+    return [(no.text, no.get("href", "")) for no in soup.select(seletor)]
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+@pytest.mark.parametrize("seletor", SELETORES)
+def test_parse_parcial_igual_ao_completo(seletor, parser):
+    assert _selecionar_bs4(HTML, seletor, parser) == _parse_completo(HTML, seletor, parser)
+
+
+@pytest.mark.parametrize("seletor", [".story a", "h2 + a", "li:first-child a", "h3 a, .x a"])
+def test_seletores_sem_tag_ou_com_irmaos_usam_parse_completo(seletor):
+    assert tags_do_seletor(seletor) is None
+
+
+def test_seletores_do_registro_usam_parse_parcial():
+    from extracao import carregar_registro
+    for host, seletor in carregar_registro().items():
+        assert tags_do_seletor(seletor), host
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_extrair_resolve_links(parser):
+    entradas = extrair("https://www.reuters.com/markets/", HTML, backend=parser)
+    assert {"titulo": "Petróleo cai", "link": "https://www.reuters.com/8", "resumo": ""} in entradas
@@ -0,0 +1,28 @@
+import pytest
+from benchmarks import importar_em_processo_novo
+
+# Módulo -> (dependências pesadas que ele pode carregar, tempo máximo de importação em segundos).
+# Orçamentos em ~1,5x o medido (melhor de três); configuracao tem piso de 10 ms contra ruído.
+ORCAMENTO_IMPORTACAO = {
+    "configuracao": ((), 0.01),
+    "metricas": ((), 0.05),
+    "tarefas": ((), 0.065),
+    "noticias": ((), 0.075),
+    "instantaneos": ((), 0.055),
+    "previsao": (("torch", "pandas", "numpy"), 3.5),
+}
+
+
+@pytest.mark.parametrize("modulo", list(ORCAMENTO_IMPORTACAO))
+def test_importacao_carrega_so_o_permitido(modulo, diretorio_codigo):
+    permitidos, _ = ORCAMENTO_IMPORTACAO[modulo]
+    _, carregados = importar_em_processo_novo(modulo, diretorio_codigo)
+    assert set(carregados) <= set(permitidos), f"{modulo} carrega {sorted(set(carregados) - set(permitidos))}"
+
+
+@pytest.mark.parametrize("modulo", list(ORCAMENTO_IMPORTACAO))
+def test_importacao_dentro_do_orcamento(modulo, diretorio_codigo):
+    _, limite = ORCAMENTO_IMPORTACAO[modulo]
+    # Melhor de três: a primeira importação paga o cache de disco frio
+    segundos = min(importar_em_processo_novo(modulo, diretorio_codigo)[0] for _ in range(3))
+    assert segundos <= limite, f"{modulo} levou {segundos:.3f}s (orçamento {limite:.3f}s)"
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+import indicadores
+from indicadores import calcular_indicadores, obter_indicadores, COLUNAS_INDICADORES
+from janelas import criar_janelas
+
+INICIO = "2020-01-01"
+
+
+def _serie(n=300, semente=0):
+    rng = np.random.default_rng(semente)
+    valores = 50 + np.cumsum(rng.normal(0, 1, n))
+    # Trechos planos (ganho e perda zerados: RSI 0/0) e só de alta (perda zerada: RSI 100)
+    valores[:20] = 50.0
+    valores[120:150] = valores[119]
+    valores[200:220] = valores[199] + np.arange(1, 21)
+    return pd.Series(valores, index=pd.bdate_range("2020-01-01", periods=n), name="Close")
+
+
+def _mesma_tabela(obtida, esperada):
+    assert list(obtida.columns) == COLUNAS_INDICADORES
+    assert obtida.index.equals(esperada.index)
+    # NaN nas mesmas posições e valores iguais a menos de erro de ponto flutuante
+    pd.testing.assert_frame_equal(obtida.isna(), esperada[COLUNAS_INDICADORES].isna(), check_freq=False)
+    pd.testing.assert_frame_equal(obtida, esperada[COLUNAS_INDICADORES], check_exact=False, rtol=1e-7, atol=1e-7,
+                                  check_freq=False)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(indicadores, "DIRETORIO_INDICADORES", str(tmp_path))
+    chamadas = []
+    original = indicadores.calcular_indicadores
+
+    def calcular(close):
+        chamadas.append(len(close))
+        return original(close)
+
+    monkeypatch.setattr(indicadores, "calcular_indicadores", calcular)
+    return chamadas
+
+
+@pytest.mark.parametrize("corte", [1, 2, 15, 25, 125, 210, 299])
+def test_prefixo_e_depois_o_resto_igual_ao_lote(cache, corte):
+    close = _serie()
+
+    _mesma_tabela(obter_indicadores("KC=F", close[:corte], INICIO), calcular_indicadores(close[:corte]))
+    _mesma_tabela(obter_indicadores("KC=F", close, INICIO), calcular_indicadores(close))
+    # Só o prefixo foi calculado em lote; o resto veio do estado incremental
+    assert cache == [corte]
+
+
+def test_varias_rodadas_de_um_candle(cache):
+    close = _serie(semente=1)
+    obter_indicadores("KC=F", close[:100], INICIO)
+    for fim in range(101, len(close) + 1):
+        tabela = obter_indicadores("KC=F", close[:fim], INICIO)
+    _mesma_tabela(tabela, calcular_indicadores(close))
+    assert cache == [100]
+
+
+def test_ultimo_candle_revisado_recalcula_tudo(cache):
+    close = _serie()
+    obter_indicadores("KC=F", close[:200], INICIO)
+
+    revisado = close.copy()
+    revisado.iloc[199] += 3.0
+    _mesma_tabela(obter_indicadores("KC=F", revisado, INICIO), calcular_indicadores(revisado))
+    assert cache == [200, len(revisado)]
+
+    # O estado regravado depois do recálculo continua servindo para os próximos candles
+    mais = pd.concat([revisado, _serie(310)[300:] + (revisado.iloc[-1] - 50)])
+    _mesma_tabela(obter_indicadores("KC=F", mais, INICIO), calcular_indicadores(mais))
+    assert cache == [200, len(revisado)]
+
+
+def test_cache_de_outro_inicio_nao_e_reaproveitado(cache):
+    close = _serie()
+    obter_indicadores("KC=F", close[:100], INICIO)
+    _mesma_tabela(obter_indicadores("KC=F", close, "2019-01-01"), calcular_indicadores(close))
+    assert cache == [100, len(close)]
+
+
+def _janelas_laco(dados, seq_length, horizonte):
+    # Laço de previsao.preprocessar_dados antes das views, generalizado para alvos de vários dias
+    X, y = [], []
+    for i in range(seq_length, len(dados) - horizonte + 1):
+        X.append(dados[i - seq_length:i])
+        y.append(dados[i:i + horizonte, 0])
+    X = np.array(X, dtype=np.float32).reshape(-1, seq_length, dados.shape[1])
+    return X, np.array(y, dtype=np.float32).reshape(-1, horizonte)
+
+
+@pytest.mark.parametrize("seq_length,horizonte", [(45, 1), (45, 10), (5, 3), (10, 11), (1, 1)])
+def test_criar_janelas_igual_ao_laco(seq_length, horizonte):
+    dados = np.random.default_rng(seq_length + horizonte).normal(size=(60, 7))
+    X, y = criar_janelas(dados, seq_length, horizonte)
+    X_laco, y_laco = _janelas_laco(dados, seq_length, horizonte)
+
+    assert X.shape == X_laco.shape and y.shape == y_laco.shape
+    assert X.dtype == np.float32 and y.dtype == np.float32
+    np.testing.assert_array_equal(X, X_laco)
+    np.testing.assert_array_equal(y, y_laco)
+
+
+def test_criar_janelas_sem_dados_suficientes():
+    X, y = criar_janelas(np.zeros((12, 3)), 10, 5)
+    assert X.shape == (0, 10, 3) and y.shape == (0, 5)
@@ -0,0 +1,30 @@
+import torch
+from configuracao import TICKERS_VALIDOS
+from modelo_global import LSTMGlobal, ordem_embedding, crescer_embedding
+
+
+def test_ordem_fixa_independe_dos_tickers_com_dados():
+    todos = ordem_embedding(list(TICKERS_VALIDOS))
+    assert todos == list(TICKERS_VALIDOS)
+    assert ordem_embedding(["KC=F", "GC=F"]) == todos
+    assert ordem_embedding(["KC=F"])[:len(todos)] == todos
+
+
+def test_tickers_novos_entram_no_fim_sem_mudar_os_anteriores():
+    anterior = ordem_embedding(["KC=F", "XYZ=F"])
+    ordem = ordem_embedding(["ABC=F", "KC=F", "XYZ=F"], anterior)
+    assert ordem[:len(anterior)] == anterior
+    assert ordem[len(anterior):] == ["ABC=F"]
+
+
+def test_crescer_embedding_preserva_as_linhas_aprendidas():
+    model = LSTMGlobal(input_size=3, n_tickers=4, dim_embedding=2, hidden_size=4, num_layers=1, dropout=0.0)
+    pesos = model.embedding.weight.detach().clone()
+
+    crescer_embedding(model, 6)
+
+    assert model.embedding.num_embeddings == 6
+    assert torch.equal(model.embedding.weight[:4], pesos)
+    assert torch.allclose(model.embedding.weight[4], pesos.mean(dim=0))
+    saida = model(torch.zeros(2, 5, 3), torch.tensor([0, 5]))
+    assert saida.shape == (2, 1)
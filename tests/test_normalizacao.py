@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from normalizacao import MinMaxScaler, mean_squared_error
+
+preprocessing = pytest.importorskip("sklearn.preprocessing")
+sk_metrics = pytest.importorskip("sklearn.metrics")
+
+
+@pytest.fixture
+def dados():
+    gerador = np.random.default_rng(0)
+    X = gerador.normal(100, 20, size=(500, 7))
+    # Coluna constante: o sklearn usa escala 1 em vez de dividir por zero
+    X[:, 3] = 5.0
+    return X
+
+
+@pytest.mark.parametrize("faixa", [(0, 1), (-1, 1)])
+def test_minmaxscaler_igual_ao_sklearn(dados, faixa):
+    nosso = MinMaxScaler(feature_range=faixa).fit(dados[:400])
+    referencia = preprocessing.MinMaxScaler(feature_range=faixa).fit(dados[:400])
+
+    for atributo in ("data_min_", "data_max_", "data_range_", "scale_", "min_"):
+        np.testing.assert_allclose(getattr(nosso, atributo), getattr(referencia, atributo))
+    # Linhas fora da faixa do ajuste (as últimas 100) também precisam coincidir
+    np.testing.assert_allclose(nosso.transform(dados), referencia.transform(dados))
+    np.testing.assert_allclose(nosso.inverse_transform(dados), referencia.inverse_transform(dados))
+    np.testing.assert_allclose(MinMaxScaler(feature_range=faixa).fit_transform(dados), referencia.fit_transform(dados))
+
+
+def test_minmaxscaler_valida_entradas(dados):
+    with pytest.raises(ValueError):
+        MinMaxScaler().transform(dados)
+    with pytest.raises(ValueError):
+        MinMaxScaler().fit(dados).transform(dados[:, :3])
+    with pytest.raises(ValueError):
+        MinMaxScaler(feature_range=(1, 0)).fit(dados)
+
+
+@pytest.mark.parametrize("formato", [(50,), (50, 1), (50, 3)])
+def test_mean_squared_error_igual_ao_sklearn(formato):
+    gerador = np.random.default_rng(1)
+    real, previsto = gerador.normal(size=formato), gerador.normal(size=formato)
+    assert mean_squared_error(real, previsto) == pytest.approx(sk_metrics.mean_squared_error(real, previsto))
+
+
+def test_mean_squared_error_formatos_diferentes():
+    with pytest.raises(ValueError):
+        mean_squared_error(np.zeros(3), np.zeros(4))
@@ -0,0 +1,55 @@
+import time
+import pytest
+import indice_noticias
+import noticias
+from configuracao import TICKERS_VALIDOS
+
+
+TITULOS = [
+    "Coffee futures rally as Brazil supply tightens",
+    "Preço do café arábica sobe na bolsa",
+    "Gold price hits record as market weighs rates",
+    "Soybean meal exports lift soybean market",
+    "Oil market: WTI oil and Brent oil futures fall",
+    "Corn recipe for summer cooking",
+    "Cacau: oferta menor pressiona mercado",
+    "Natural gas demand climbs with cold weather",
+]
+
+
+@pytest.fixture
+def indice(tmp_path, monkeypatch):
+    caminho = str(tmp_path / "noticias.sqlite3")
+    monkeypatch.setattr(noticias, "conectar", lambda: indice_noticias.conectar(caminho))
+    monkeypatch.setattr(noticias, "iniciar_ingestor", lambda *args, **kwargs: None)
+
+    agora = time.time()
+    entradas = [
+        {"titulo": titulo, "link": f"https://exemplo.com/{i}", "resumo": "", "publicado_em": agora - i * 60}
+        for i, titulo in enumerate(TITULOS * 4)
+    ]
+    for i, entrada in enumerate(entradas):
+        entrada["link"] += f"-{i}"
+    conexao = indice_noticias.conectar(caminho)
+    try:
+        indice_noticias.gravar_artigos(conexao, {"https://exemplo.com/rss": entradas}, agora)
+    finally:
+        conexao.close()
+
+
+def test_lote_igual_a_busca_por_ticker(indice):
+    tickers = list(TICKERS_VALIDOS)
+    lote = noticias.buscar_noticias_lote(tickers)
+
+    assert list(lote) == tickers
+    for ticker in tickers:
+        assert lote[ticker] == noticias.buscar_noticias(noticias.obter_nome_commodity(ticker), ticker), ticker
+    assert any(isinstance(valor, list) for valor in lote.values())
+    assert any(isinstance(valor, dict) for valor in lote.values())
+
+
+def test_lote_com_ticker_fora_da_lista(indice):
+    lote = noticias.buscar_noticias_lote(["KC=F", "XYZ"])
+
+    assert isinstance(lote["KC=F"], list)
+    assert "mensagem" in lote["XYZ"]
@@ -0,0 +1,70 @@
+import random
+import pytest
+from configuracao import TICKERS_VALIDOS, TERMOS_INGLES
+from relevancia import PALAVRAS_RELEVANTES, PALAVRAS_IGNORAR, ClassificadorNoticias, classificador_padrao, normalizar
+
+TERMOS = {ticker: [nome, TERMOS_INGLES.get(nome, nome.lower())] for ticker, nome in TICKERS_VALIDOS.items()}
+
+
+def filtro_antigo(texto, termos_por_chave=TERMOS):
+    """O filtro any/in por ticker que o classificador substituiu, sobre o texto já sem acentos."""
+    conteudo = normalizar(texto)
+    if not any(normalizar(p) in conteudo for p in PALAVRAS_RELEVANTES):
+        return set()
+    if any(normalizar(p) in conteudo for p in PALAVRAS_IGNORAR):
+        return set()
+    return {
+        chave for chave, termos in termos_por_chave.items()
+        if any(normalizar(t).strip() and normalizar(t).strip() in conteudo for t in termos)
+    }
+
+
+def textos_aleatorios(n, semente):
+    """Textos com termos, palavras-chave e pedaços deles colados, para forçar sobreposições e prefixos."""
+    gerador = random.Random(semente)
+    pedacos = [t for termos in TERMOS.values() for t in termos] + PALAVRAS_RELEVANTES + PALAVRAS_IGNORAR
+    pedacos += "the of em de para sobre weather rally china brasil".split()
+    textos = []
+    for _ in range(n):
+        partes = []
+        for _ in range(gerador.randint(1, 10)):
+            pedaco = gerador.choice(pedacos)
+            sorteio = gerador.random()
+            if sorteio < 0.2:
+                # Só um trecho da palavra: prefixos e sufixos não podem casar sozinhos
+                inicio = gerador.randrange(len(pedaco))
+                pedaco = pedaco[inicio:gerador.randint(inicio + 1, len(pedaco))]
+            elif sorteio < 0.3:
+                pedaco = pedaco.upper()
+            partes.append(pedaco)
+        separador = gerador.choice([" ", "", "-"])
+        textos.append(separador.join(partes))
+    return textos
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_classificador_igual_ao_filtro_antigo_por_entrada(semente):
+    classificador = classificador_padrao()
+    for texto in textos_aleatorios(2000, semente):
+        assert classificador.classificar(texto) == filtro_antigo(texto), texto
+
+
+def test_classificar_lote_distribui_cada_entrada():
+    entradas = [{"titulo": t[:20], "resumo": t[20:]} for t in textos_aleatorios(500, 99)]
+    por_chave = classificador_padrao().classificar_lote(entradas)
+    for entrada in entradas:
+        esperado = filtro_antigo(entrada["titulo"] + " " + entrada["resumo"])
+        obtido = {chave for chave, lista in por_chave.items() if any(e is entrada for e in lista)}
+        assert obtido == esperado
+
+
+def test_termos_sobrepostos_contam_para_todas_as_chaves():
+    classificador = ClassificadorNoticias({"curto": ["trigo"], "longo": ["trigo vermelho"]})
+    assert classificador.classificar("Preço do trigo vermelho sobe") == {"curto", "longo"}
+    assert classificador.classificar("Preço do trigo sobe") == {"curto"}
+
+
+def test_acentos_sao_ignorados():
+    classificador = ClassificadorNoticias({"KC=F": ["Café Arábica"]})
+    assert classificador.classificar("cafe arabica: cotacao em alta") == {"KC=F"}
+    assert classificador.classificar("Café Arábica: receita de bolo com preço baixo") == set()